@@ -11,8 +11,9 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from google.oauth2.service_account import Credentials
 from utils.layout import load_css
-from utils.search_db import search_similar_titles, initialize_db
-from utils.search_arxiv import search_arxiv
+from utils.search_db import facet_values, initialize_db, search_with_facets
+from utils.query_analysis import analyze_query
+from utils.search_arxiv import no_results, open_arxiv_cursor
 from utils.explain_topic import explain_topic
 from utils.beautiful_pdf_generator import generate_pdf
 from utils.generate_paper import generate_research_paper
@@ -357,6 +358,89 @@ def convert_doi_to_links(text):
     
     return linked_text
 
+# arXiv 결과 더 보기 버튼 - 다음 페이지만 검색/요약해 세션 캐시에 추가
+def show_more_arxiv_button():
+    cursor = st.session_state.arxiv_cursor
+    if cursor is None or cursor.exhausted:
+        return
+    if st.button("🔽 arXiv 논문 더 보기", key="arxiv_more"):
+        with st.spinner("🔍 arXiv 논문 더 불러오는 중..."):
+            try:
+                cursor.next_page()
+            except Exception as e:
+                st.error(f"arXiv 검색 중 오류: {str(e)}")
+                return
+        if cursor.results:
+            st.session_state.cached_arxiv_results = cursor.results
+        st.rerun()
+
+# ISEF 결과 필터 - 사이드바에서 분야/연도/수상 여부 선택 (사전 계산된 패싯 색인 사용)
+def isef_filter_sidebar():
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### 🎛️ ISEF 결과 필터")
+    try:
+        values = facet_values()
+    except Exception as e:
+        print(f"⚠️ 패싯 값 로드 실패: {e}")
+        return {}
+    
+    filters = {}
+    categories = st.sidebar.multiselect("분야", values["category"], key="isef_categories")
+    if categories:
+        filters["category"] = categories
+    years = values["year"]
+    if len(years) > 1:
+        year_range = st.sidebar.slider("연도", years[0], years[-1], (years[0], years[-1]), key="isef_years")
+        if tuple(year_range) != (years[0], years[-1]):
+            filters["year"] = tuple(year_range)
+    if st.sidebar.checkbox("🏆 수상작만", key="isef_awarded"):
+        filters["award"] = True
+    return filters
+
+# 필터만 바뀐 경우 - 주제 해설/arXiv는 그대로 두고 ISEF 검색만 다시 실행
+def refresh_isef_results(topic, filters):
+    st.session_state.last_isef_filters = filters
+    with st.spinner("🔍 필터를 적용해 ISEF 프로젝트를 다시 검색 중..."):
+        try:
+            results, st.session_state.cached_isef_facets = search_with_facets(
+                topic, analysis=st.session_state.query_analysis, filters=filters
+            )
+        except Exception as e:
+            st.error(f"내부 DB 검색 중 오류: {str(e)}")
+            results, st.session_state.cached_isef_facets = [], {}
+    st.session_state.cached_internal_results = results
+    
+    # PDF용 텍스트의 ISEF 부분만 교체
+    section = "## 📄 내부 DB 유사 논문\n\n"
+    if not results:
+        section += "❗ 관련 프로젝트가 없습니다.\n\n"
+    for project in results:
+        meta_parts = []
+        if project.get('연도'):
+            meta_parts.append(f"📅 {project['연도']}")
+        if project.get('분야'):
+            meta_parts.append(f"🔬 {project['분야']}")
+        if project.get('국가'):
+            loc = project['국가']
+            if project.get('지역'):
+                loc += f", {project['지역']}"
+            meta_parts.append(f"🌎 {loc}")
+        if project.get('수상'):
+            meta_parts.append(f"🏆 {project['수상']}")
+        section += f"- **{project.get('제목', '')}**\n{project.get('요약', '')}\n_{' · '.join(meta_parts)}_\n\n"
+    full_text = st.session_state.full_text
+    start = full_text.find("## 📄 내부 DB 유사 논문")
+    end = full_text.find("## 🌐 arXiv 유사 논문")
+    if start >= 0 and end > start:
+        st.session_state.full_text = full_text[:start] + section + full_text[end:]
+
+# 검색어에 걸린 ISEF 프로젝트의 분야별 개수 (상위 5개)
+def show_isef_facet_caption():
+    counts = st.session_state.cached_isef_facets.get("category", {})
+    if counts:
+        top = list(counts.items())[:5]
+        st.caption("🔬 분야별 관련 프로젝트: " + " · ".join(f"{name} {count}" for name, count in top))
+
 # 기본 설정
 st.set_page_config(page_title="LittleScienceAI", layout="wide")
 load_css()
@@ -462,6 +546,14 @@ if 'cached_internal_results' not in st.session_state:
     st.session_state.cached_internal_results = []
 if 'cached_arxiv_results' not in st.session_state:
     st.session_state.cached_arxiv_results = []
+if 'arxiv_cursor' not in st.session_state:
+    st.session_state.arxiv_cursor = None
+if 'last_isef_filters' not in st.session_state:
+    st.session_state.last_isef_filters = {}
+if 'cached_isef_facets' not in st.session_state:
+    st.session_state.cached_isef_facets = {}
+if 'query_analysis' not in st.session_state:
+    st.session_state.query_analysis = None
 
 # 🔥 사이드바에 이용권 정보 표시
 license_info = get_license_info(st.session_state.user_license_key)
@@ -567,6 +659,9 @@ st.sidebar.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# ISEF 결과 필터
+isef_filters = isef_filter_sidebar()
+
 # 메인 타이틀
 st.title("🧪 과학논문 주제 탐색 도우미")
 
@@ -597,14 +692,22 @@ if not topic:
 # 🔥 주제가 입력된 경우 (캐싱 로직 적용)
 if topic:
    
-    # 🔥 수정된 코드:
-    if (st.session_state.last_searched_topic != topic or 
-        len(st.session_state.cached_internal_results) == 0 or 
-        len(st.session_state.cached_arxiv_results) == 0):
+    # 🔥 새 검색은 주제가 바뀔 때만 - 결과가 비어 있어도 다시 실행하지 않음
+    # (필터 변경은 ISEF만 다시 검색, '더 보기'는 세션의 arXiv 커서로 다음 페이지만 가져옴)
+    if st.session_state.last_searched_topic != topic:
         # 새 주제 검색
         st.session_state.last_searched_topic = topic
+        st.session_state.last_isef_filters = isef_filters
         st.session_state.generated_paper = {}  # 논문 초기화
         
+        # 🧠 검색어 분석 한 번만 (번역 포함) - 내부 DB/arXiv 검색이 함께 사용
+        try:
+            query_analysis = analyze_query(topic)
+        except Exception as e:
+            print(f"⚠️ 검색어 분석 실패: {e}")
+            query_analysis = None
+        st.session_state.query_analysis = query_analysis
+        
 # 주제 해설 표시
         st.subheader("📘 주제 해설")
         
@@ -662,8 +765,11 @@ if topic:
         with st.spinner("🔍 ISEF 관련 프로젝트를 빠르게 검색 중..."):
             try:
                 # 검색 실행 및 캐시 저장
-                st.session_state.cached_internal_results = search_similar_titles(topic)
-                internal_results = st.session_state.cached_internal_results
+                internal_results, st.session_state.cached_isef_facets = search_with_facets(
+                    topic, analysis=query_analysis, filters=isef_filters
+                )
+                st.session_state.cached_internal_results = internal_results
+                show_isef_facet_caption()
                 
                 if not internal_results:
                     st.info("❗ 관련 프로젝트가 없습니다.")
@@ -713,6 +819,7 @@ if topic:
             except Exception as e:
                 st.error(f"내부 DB 검색 중 오류: {str(e)}")
                 st.session_state.cached_internal_results = []
+                st.session_state.cached_isef_facets = {}
                 st.session_state.full_text += "## 📄 내부 DB 유사 논문\n\n검색 중 오류 발생\n\n"
         
         # 🔥 arXiv 결과 (검색 실행 + 결과 저장)
@@ -721,7 +828,10 @@ if topic:
         with st.spinner("🔍 arXiv 논문 검색 중..."):
             try:
                 # 검색 실행 및 캐시 저장
-                st.session_state.cached_arxiv_results = search_arxiv(topic)
+                # 첫 페이지만 검색/요약 - 나머지는 '더 보기'로 불러옴
+                cursor = open_arxiv_cursor(topic, analysis=query_analysis)
+                st.session_state.arxiv_cursor = cursor
+                st.session_state.cached_arxiv_results = cursor.results or no_results(cursor.english_query)
                 arxiv_results = st.session_state.cached_arxiv_results
                 
                 if not arxiv_results:
@@ -755,13 +865,19 @@ if topic:
                         """, unsafe_allow_html=True)
                         
                         st.session_state.full_text += f"- **{title}**\n{summary}\n[링크]({link})\n\n"
+                    
+                    show_more_arxiv_button()
             except Exception as e:
                 st.error(f"arXiv 검색 중 오류: {str(e)}")
+                st.session_state.arxiv_cursor = None
                 st.session_state.cached_arxiv_results = []
                 st.session_state.full_text += "## 🌐 arXiv 유사 논문\n\n검색 중 오류 발생\n\n"
     
     else:
         # 🔥 같은 주제 - 캐시 사용 (스피너 없이 저장된 결과 표시)
+        if st.session_state.last_isef_filters != isef_filters:
+            refresh_isef_results(topic, isef_filters)
+        
         st.subheader("📘 주제 해설")
         if st.session_state.full_text:
             explanation_part = st.session_state.full_text.split("## 📄 내부 DB 유사 논문")[0]
@@ -771,6 +887,7 @@ if topic:
         
         # 🔥 캐시된 ISEF 결과 표시 (원본 로직 그대로)
         st.subheader("📄 ISEF (International Science and Engineering Fair) 출품논문")
+        show_isef_facet_caption()
         
         internal_results = st.session_state.cached_internal_results
         if not internal_results:
@@ -844,6 +961,8 @@ if topic:
                     <a href="{link}" target="_blank" style="color: #0969da; text-decoration: none;">🔗 논문 링크 보기</a>
                 </div>
                 """, unsafe_allow_html=True)
+            
+            show_more_arxiv_button()
     
     # ========== 틈새주제 선택 섹션 추가 ==========
     if st.session_state.niche_topics:
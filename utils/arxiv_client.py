@@ -0,0 +1,229 @@
+import asyncio
+import os
+import urllib.parse
+from xml.etree import ElementTree
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.http_cache import ResponseCache, normalize_url
+from utils.rate_limit import SingleFlight, SQLiteTokenBucket, TokenBucket
+
+# 🌐 arXiv API 주소 (테스트용 로컬 서버로 교체 가능)
+ARXIV_API_URL = os.environ.get("LSAI_ARXIV_API_URL", "http://export.arxiv.org/api/query")
+
+# 연결/응답 제한 시간 (초)
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 20
+
+# 연결 풀 크기 - 동시에 여러 세션이 검색해도 keep-alive 연결 재사용
+POOL_SIZE = 16
+
+USER_AGENT = "LittleScienceAI/1.0 (arXiv search)"
+
+# 스트리밍 파싱 단위 (bytes)
+STREAM_CHUNK_SIZE = 16 * 1024
+# 캐시에 저장할 응답 본문 최대 크기 (bytes) - 넘으면 모아두던 본문을 버리고 저장하지 않음
+MAX_CACHED_BODY = int(os.environ.get("LSAI_ARXIV_MAX_CACHED_BODY", 2 * 1024 * 1024))
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+
+# 🗃️ 응답 캐시 사용 여부 (LSAI_ARXIV_CACHE=0 이면 항상 네트워크 요청)
+RESPONSE_CACHE_ENABLED = os.environ.get("LSAI_ARXIV_CACHE", "1") != "0"
+
+# ⏳ arXiv 요청 속도 제한 (arXiv 권장: 3초에 1회) - LSAI_ARXIV_RATE_SHARED=1 이면 프로세스 간 공유
+RATE_PER_SECOND = float(os.environ.get("LSAI_ARXIV_RATE", 1 / 3))
+RATE_BURST = int(os.environ.get("LSAI_ARXIV_BURST", 3))
+RATE_SHARED = os.environ.get("LSAI_ARXIV_RATE_SHARED", "0") == "1"
+RATE_WAIT_TIMEOUT = 30  # 토큰 대기 최대 시간 (초)
+
+_SESSION = None
+_RESPONSE_CACHE = None
+_RATE_LIMITER = None
+_IN_FLIGHT = SingleFlight()
+
+
+def get_session():
+    """프로세스 공용 HTTP 세션 (keep-alive 연결 풀)"""
+    global _SESSION
+    if _SESSION is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = USER_AGENT
+        _SESSION = session
+    return _SESSION
+
+
+def get_response_cache():
+    """프로세스 공용 arXiv 응답 캐시 (비활성화 시 None)"""
+    global _RESPONSE_CACHE
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    if _RESPONSE_CACHE is None:
+        _RESPONSE_CACHE = ResponseCache("arxiv_responses")
+    return _RESPONSE_CACHE
+
+
+def get_rate_limiter():
+    """프로세스 공용 arXiv 토큰 버킷"""
+    global _RATE_LIMITER
+    if _RATE_LIMITER is None:
+        if RATE_SHARED:
+            _RATE_LIMITER = SQLiteTokenBucket("arxiv_api", RATE_PER_SECOND, RATE_BURST)
+        else:
+            _RATE_LIMITER = TokenBucket(RATE_PER_SECOND, RATE_BURST)
+    return _RATE_LIMITER
+
+
+def cache_stats():
+    """응답 캐시 적중/실패 통계 (캐시 크기 조정용)"""
+    cache = get_response_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def build_query_url(search_term, start=0, max_results=5, base_url=None):
+    """검색어 → arXiv API 요청 URL"""
+    encoded_query = urllib.parse.quote(search_term)
+    return f"{base_url or ARXIV_API_URL}?search_query=all:{encoded_query}&start={start}&max_results={max_results}"
+
+
+def fetch_bytes(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+    """URL의 응답 본문(bytes)과 상태 코드 반환 - HTTP 오류는 예외
+
+    같은 URL을 동시에 요청하면 한 번만 가져와 결과를 함께 사용
+    """
+    return _IN_FLIGHT.do(normalize_url(url), _fetch_bytes, url, timeout)
+
+
+def _cached_or_request(url, timeout, stream=False):
+    """신선한 캐시 항목이면 (항목, None), 아니면 (None, 응답) - 오래된 항목은 조건부 요청으로 재검증"""
+    cache = get_response_cache()
+    cached = None
+    if cache is not None:
+        try:
+            cached = cache.lookup(url)
+            if cache.is_fresh(cached):
+                cache.record_hit(url)
+                return cached, None
+        except Exception as e:
+            print(f"⚠️ 응답 캐시 조회 실패: {e}")
+            cached = None
+
+    headers = cache.conditional_headers(cached) if cache is not None else {}
+    get_rate_limiter().acquire(timeout=RATE_WAIT_TIMEOUT)
+    response = get_session().get(url, headers=headers, timeout=timeout, stream=stream)
+    if response.status_code == 304 and cached is not None:
+        response.close()
+        cache.refresh(url)
+        return cached, None
+    try:
+        response.raise_for_status()
+    except Exception:
+        response.close()
+        raise
+    return None, response
+
+
+def _store_response(url, content, response):
+    """새로 받은 응답을 캐시에 저장"""
+    cache = get_response_cache()
+    if cache is None:
+        return
+    cache.record_miss()
+    try:
+        cache.store(url, content, response.status_code,
+                    response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    except Exception as e:
+        print(f"⚠️ 응답 캐시 저장 실패: {e}")
+
+
+def _fetch_bytes(url, timeout):
+    cached, response = _cached_or_request(url, timeout)
+    if response is None:
+        return cached.body, cached.status
+    _store_response(url, response.content, response)
+    return response.content, response.status_code
+
+
+def _text(elem, tag):
+    """자식 요소의 텍스트 (연속 공백 정리)"""
+    child = elem.find(tag)
+    return " ".join((child.text or "").split()) if child is not None else ""
+
+
+def _entry_record(elem):
+    """Atom <entry> 요소 → 가벼운 항목 dict (id, title, summary, link)"""
+    entry_id = (elem.findtext(ATOM_NS + "id") or "").strip()
+    link = entry_id
+    for link_elem in elem.iterfind(ATOM_NS + "link"):
+        if link_elem.get("rel", "alternate") == "alternate" and link_elem.get("href"):
+            link = link_elem.get("href")
+            break
+    return {
+        "id": entry_id,
+        "title": _text(elem, ATOM_NS + "title"),
+        "summary": (elem.findtext(ATOM_NS + "summary") or "").strip(),
+        "link": link,
+    }
+
+
+def parse_entries(chunks):
+    """Atom 응답 조각(bytes)들을 받는 대로 파싱해 항목을 하나씩 반환 - 전체 트리를 만들지 않음"""
+    parser = ElementTree.XMLPullParser(events=("end",))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            if elem.tag == ATOM_NS + "entry":
+                yield _entry_record(elem)
+                elem.clear()
+    parser.close()
+    for _, elem in parser.read_events():
+        if elem.tag == ATOM_NS + "entry":
+            yield _entry_record(elem)
+
+
+def iter_entries(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+    """arXiv 응답을 스트리밍으로 받아 항목이 도착하는 대로 반환 (다 받으면 캐시에 저장)
+
+    캐시용 본문은 MAX_CACHED_BODY까지만 모아두고, 넘거나 캐시를 쓰지 않으면 모으지 않음
+    """
+    cached, response = _cached_or_request(url, timeout, stream=True)
+    if response is None:
+        yield from parse_entries([cached.body])
+        return
+
+    received = [] if get_response_cache() is not None else None
+    size = 0
+
+    def _chunks():
+        nonlocal received, size
+        for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+            if received is not None:
+                size += len(chunk)
+                if size <= MAX_CACHED_BODY:
+                    received.append(chunk)
+                else:
+                    print(f"⚠️ 응답이 커서 캐시에 저장하지 않음 ({MAX_CACHED_BODY} bytes 초과)")
+                    received = None
+            yield chunk
+
+    with response:
+        yield from parse_entries(_chunks())
+    if received is not None:
+        _store_response(url, b"".join(received), response)
+
+
+def fetch_entries(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+    """arXiv 항목 목록 (스트리밍 파서) - 같은 URL 동시 요청은 한 번만 가져옴"""
+    return _IN_FLIGHT.do(("entries", normalize_url(url)), lambda: list(iter_entries(url, timeout)))
+
+
+async def fetch_entries_async(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+    """arXiv 항목 목록 (asyncio) - 공용 연결 풀/스트리밍 파서를 작업 스레드에서 사용"""
+    return await asyncio.to_thread(fetch_entries, url, timeout)
+
+
+async def fetch_entries_many_async(urls, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+    """여러 URL을 동시에 가져오기 - 입력 순서대로 결과 (실패한 URL은 예외 객체)"""
+    return await asyncio.gather(*(fetch_entries_async(url, timeout) for url in urls), return_exceptions=True)
@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from utils.bm25_index import BM25Index, count_terms, merge_runs, save_run
+
+# 📁 로컬 arXiv 미러 저장 경로
+MIRROR_DIR = os.environ.get("LSAI_ARXIV_MIRROR", os.path.join("data", "arxiv_mirror"))
+METADATA_FILE = "metadata.arrow"
+POSTINGS_DIR = "postings"
+RUNS_DIR = "runs"  # 빌드 중 청크별 정렬된 포스팅 (빌드 후 삭제)
+
+# 한 번에 토큰화할 논문 수 (메모리 사용량 제한)
+CHUNK_SIZE = 100_000
+
+# 필드별 BM25 포스팅과 점수 가중치 - 제목에 맞은 논문이 초록에만 맞은 논문보다 위로 오도록 함
+FIELD_WEIGHTS = {"title": 2.0, "abstract": 1.0}
+
+# 필드별로 먼저 뽑는 후보 수 (최소값) - 후보를 합친 뒤 모든 필드 점수로 다시 계산
+FIELD_CANDIDATES = 100
+
+_METADATA_SCHEMA = pa.schema([
+    ("arxiv_id", pa.string()),
+    ("version", pa.string()),
+    ("title", pa.string()),
+    ("abstract", pa.string()),
+    ("categories", pa.string()),
+    ("update_date", pa.string()),
+])
+
+
+def _clean_text(text):
+    """줄바꿈/연속 공백 정리"""
+    return " ".join(str(text or "").split())
+
+
+def _read_records(jsonl_path, categories=None, limit=None):
+    """arXiv 메타데이터 스냅샷(JSON lines)을 한 줄씩 읽어 필요한 필드만 반환"""
+    count = 0
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            record_categories = record.get("categories", "") or ""
+            if categories and not any(c in record_categories.split() for c in categories):
+                continue
+            versions = record.get("versions") or []
+            yield {
+                "arxiv_id": str(record.get("id", "")).strip(),
+                "version": versions[-1].get("version", "") if versions else "",
+                "title": _clean_text(record.get("title")),
+                "abstract": _clean_text(record.get("abstract")),
+                "categories": record_categories,
+                "update_date": record.get("update_date", "") or "",
+            }
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+
+def ingest_snapshot(jsonl_path, out_dir=MIRROR_DIR, categories=None, limit=None, chunk_size=CHUNK_SIZE):
+    """arXiv 스냅샷 → 컬럼형 메타데이터(Arrow IPC) + 제목/초록 필드별 BM25 포스팅
+
+    청크마다 필드별로 정렬한 포스팅을 디스크에 기록한 뒤 외부 병합 (메모리에는 청크 하나와 병합 블록만)
+    """
+    started = time.time()
+    print(f"🏗️ arXiv 미러 빌드 시작: {jsonl_path} → {out_dir}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    metadata_path = os.path.join(out_dir, METADATA_FILE)
+    metadata_tmp = f"{metadata_path}.{os.getpid()}.tmp"
+    runs_dir = os.path.join(out_dir, f"{RUNS_DIR}.{os.getpid()}.tmp")
+    run_dirs = {field: [] for field in FIELD_WEIGHTS}
+    doc_lens = {field: [] for field in FIELD_WEIGHTS}
+    n_docs = 0
+
+    try:
+        # 청크 단위로 메타데이터를 기록하고 필드별 정렬된 포스팅을 디스크에 기록
+        with pa.OSFile(metadata_tmp, "wb") as sink, pa.ipc.new_file(sink, _METADATA_SCHEMA) as writer:
+            chunk = []
+
+            def _flush():
+                nonlocal n_docs
+                if not chunk:
+                    return
+                writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=_METADATA_SCHEMA))
+                for field in FIELD_WEIGHTS:
+                    terms, posting_terms, docs, tf, doc_len = count_terms([r[field] for r in chunk], doc_offset=n_docs)
+                    run_dir = os.path.join(runs_dir, field, f"{len(run_dirs[field]):05d}")
+                    save_run(run_dir, terms, posting_terms, docs, tf)
+                    run_dirs[field].append(run_dir)
+                    doc_lens[field].append(doc_len)
+                n_docs += len(chunk)
+                print(f"   📄 {n_docs}편 처리")
+                chunk.clear()
+
+            for record in _read_records(jsonl_path, categories, limit):
+                chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    _flush()
+            _flush()
+
+        manifests = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            print(f"   🔀 {field} 포스팅 병합 ({len(run_dirs[field])}개 청크)")
+            doc_len = np.concatenate(doc_lens[field]) if doc_lens[field] else np.empty(0, dtype=np.float32)
+            manifests[field] = merge_runs(run_dirs[field], doc_len, os.path.join(out_dir, POSTINGS_DIR, field), {
+                "source_path": os.path.abspath(jsonl_path),
+                "n_docs": n_docs,
+                "field": field,
+                "weight": weight,
+            })
+        os.replace(metadata_tmp, metadata_path)
+    finally:
+        shutil.rmtree(runs_dir, ignore_errors=True)
+        if os.path.exists(metadata_tmp):
+            os.remove(metadata_tmp)
+
+    n_terms = ", ".join(f"{field} {m['n_terms']}" for field, m in manifests.items())
+    print(f"✅ arXiv 미러 빌드 완료: {n_docs}편, 용어 수 {n_terms} ({time.time() - started:.1f}초)")
+    return manifests
+
+
+class ArxivMirror:
+    """로컬 arXiv 미러 - BM25 포스팅으로 검색하고 메모리 매핑된 Arrow 테이블에서 메타데이터 조회"""
+
+    def __init__(self, mirror_dir=MIRROR_DIR):
+        self.fields = {field: BM25Index(os.path.join(mirror_dir, POSTINGS_DIR, field)) for field in FIELD_WEIGHTS}
+        source = pa.memory_map(os.path.join(mirror_dir, METADATA_FILE), "r")
+        self.metadata = pa.ipc.open_file(source).read_all()
+
+    def search_ids(self, query, k=10):
+        """필드별 상위 후보를 합친 뒤 가중합 점수로 상위 k개 (문서 번호, 점수)를 점수 내림차순으로 반환"""
+        pool = max(k * 4, FIELD_CANDIDATES)
+        candidates = np.unique(np.concatenate([index.search(query, pool)[0] for index in self.fields.values()]))
+        scores = np.zeros(len(candidates), dtype=np.float64)
+        for field, index in self.fields.items():
+            scores += FIELD_WEIGHTS[field] * index.score_docs(query, candidates)
+        order = np.lexsort((candidates, -scores))[:k]
+        return candidates[order], scores[order]
+
+    def search(self, query, max_results=5, start=0):
+        """검색어 → feedparser 항목과 같은 형태의 dict 목록 (점수 내림차순, start번째부터)"""
+        ids, scores = self.search_ids(query, start + max_results)
+        ids, scores = ids[start:], scores[start:]
+        if len(ids) == 0:
+            return []
+        rows = self.metadata.take(pa.array(np.asarray(ids, dtype=np.int64))).to_pylist()
+        entries = []
+        for row, score in zip(rows, scores):
+            link = f"http://arxiv.org/abs/{row['arxiv_id']}{row['version']}"
+            entries.append({
+                "id": link,
+                "title": row["title"],
+                "summary": row["abstract"],
+                "link": link,
+                "categories": row["categories"],
+                "updated": row["update_date"],
+                "score": float(score),
+            })
+        return entries
+
+
+_MIRROR = None
+
+
+def get_mirror(mirror_dir=MIRROR_DIR):
+    """프로세스 공용 미러 (없으면 None)"""
+    global _MIRROR
+    if _MIRROR is None:
+        postings_dir = os.path.join(mirror_dir, POSTINGS_DIR)
+        if not all(os.path.exists(os.path.join(postings_dir, field, "manifest.json")) for field in FIELD_WEIGHTS):
+            if os.path.exists(os.path.join(postings_dir, "manifest.json")):
+                print("⚠️ 이전 형식(제목/초록 통합 색인)의 arXiv 미러 - python -m utils.arxiv_mirror 로 다시 빌드 필요")
+            return None
+        _MIRROR = ArxivMirror(mirror_dir)
+    return _MIRROR
+
+
+if __name__ == "__main__":
+    # 오프라인 빌드: python -m utils.arxiv_mirror arxiv-metadata-oai-snapshot.json --categories physics.bio-ph q-bio.QM
+    parser = argparse.ArgumentParser(description="arXiv 메타데이터 스냅샷 → 로컬 검색 미러")
+    parser.add_argument("snapshot", help="arXiv 메타데이터 JSON lines 파일")
+    parser.add_argument("--out", default=MIRROR_DIR, help="미러 저장 디렉터리")
+    parser.add_argument("--categories", nargs="*", default=None, help="포함할 arXiv 분류 (생략 시 전체)")
+    parser.add_argument("--limit", type=int, default=None, help="최대 논문 수")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="청크당 논문 수")
+    args = parser.parse_args()
+
+    ingest_snapshot(args.snapshot, args.out, args.categories, args.limit, args.chunk_size)
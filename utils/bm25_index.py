@@ -0,0 +1,382 @@
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from utils.db_store import PARQUET_PATH, XLSX_PATH, ensure_store, file_sha256
+
+# 📁 BM25 인덱스 저장 경로
+BM25_DIR = os.path.join("data", "index", "bm25")
+
+# 인덱스 포맷 버전 - 저장 구조가 바뀌면 올려서 자동 재빌드
+BM25_VERSION = 1
+
+# BM25 파라미터 (빌드 시 점수에 반영되어 저장됨)
+K1 = 1.2
+B = 0.75
+
+# BM25 점수는 코사인과 범위가 달라 0보다 큰 결과를 모두 후보로 사용
+SCORE_THRESHOLDS = (0.0,)
+
+# TfidfVectorizer 기본 토큰 규칙과 동일 (2글자 이상 단어)
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+MANIFEST_FILE = "manifest.json"
+TERMS_FILE = "terms.npy"
+OFFSETS_FILE = "offsets.npy"
+DOCS_FILE = "docs.npy"
+IMPACTS_FILE = "impacts.npy"
+MAX_IMPACT_FILE = "max_impact.npy"
+TF_FILE = "tf.npy"  # 청크별 정렬된 포스팅(런)에만 사용
+
+# 런 병합 시 한 번에 메모리에 올리는 용어 수
+MERGE_BLOCK_TERMS = 50_000
+
+
+def tokenize(text):
+    """소문자 변환 후 단어 토큰 추출"""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def _save(index_dir, filename, array):
+    """임시 파일에 저장 후 교체"""
+    path = os.path.join(index_dir, filename)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def count_terms(corpus, doc_offset=0):
+    """문서 목록 → (정렬된 용어, 포스팅별 용어 번호, 문서 번호, 빈도, 문서 길이)
+
+    포스팅은 (용어, 문서) 순으로 정렬되며, 문서 번호는 doc_offset부터 시작
+    """
+    vocab = {}
+    term_ids = []
+    doc_ids = []
+    doc_len = np.zeros(len(corpus), dtype=np.float32)
+    for doc_id, text in enumerate(corpus):
+        tokens = tokenize(text)
+        doc_len[doc_id] = len(tokens)
+        for token in tokens:
+            term_ids.append(vocab.setdefault(token, len(vocab)))
+            doc_ids.append(doc_id)
+
+    n_docs = max(len(corpus), 1)
+    terms = np.array(list(vocab), dtype=str)
+
+    # 용어를 사전순으로 재번호 → 조회 시 searchsorted 사용 (사전 dict 불필요)
+    order = np.argsort(terms)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    terms = terms[order]
+
+    # (용어, 문서) 쌍별 빈도 - 용어 순, 같은 용어 안에서는 문서 순으로 정렬됨
+    keys = rank[np.asarray(term_ids, dtype=np.int64)] * n_docs + np.asarray(doc_ids, dtype=np.int64)
+    keys, tf = np.unique(keys, return_counts=True)
+    posting_terms = keys // n_docs
+    docs = (keys % n_docs + doc_offset).astype(np.int32)
+    return terms, posting_terms, docs, tf.astype(np.int32), doc_len
+
+
+def save_run(run_dir, terms, posting_terms, docs, tf):
+    """청크 하나의 정렬된 포스팅(count_terms 결과)을 디스크에 기록 - merge_runs로 병합"""
+    os.makedirs(run_dir, exist_ok=True)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(posting_terms, minlength=len(terms)), out=offsets[1:])
+    _save(run_dir, TERMS_FILE, terms)
+    _save(run_dir, OFFSETS_FILE, offsets)
+    _save(run_dir, DOCS_FILE, docs)
+    _save(run_dir, TF_FILE, tf)
+
+
+def merge_runs(run_dirs, doc_len, index_dir, manifest, k1=K1, b=B, block_terms=MERGE_BLOCK_TERMS):
+    """디스크의 런들을 용어 블록 단위로 병합해 BM25 점수와 함께 저장 (런은 문서 번호 순서대로 전달)
+
+    메모리에는 전체 용어 목록/문서 빈도/문서 길이와 용어 블록 하나의 포스팅만 올리고,
+    포스팅 배열은 메모리 매핑된 출력 파일에 블록마다 바로 기록
+    """
+    def _load(run_dir, filename):
+        return np.load(os.path.join(run_dir, filename), mmap_mode='r')
+
+    runs = [(_load(d, TERMS_FILE), _load(d, OFFSETS_FILE), _load(d, DOCS_FILE), _load(d, TF_FILE)) for d in run_dirs]
+    terms = np.unique(np.concatenate([run[0] for run in runs])) if runs else np.array([], dtype=str)
+
+    # 용어별 문서 빈도 → 출력 오프셋 (런 안에서 용어는 중복되지 않음)
+    df = np.zeros(len(terms), dtype=np.int64)
+    for run_terms, run_offsets, _, _ in runs:
+        df[np.searchsorted(terms, run_terms)] += np.diff(run_offsets)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(df, out=offsets[1:])
+    n_postings = int(offsets[-1])
+
+    n_docs = len(doc_len)
+    avgdl = float(doc_len.mean()) if n_docs else 0.0
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+    max_impact = np.zeros(len(terms), dtype=np.float32)
+
+    os.makedirs(index_dir, exist_ok=True)
+    outputs = {}
+    for filename, dtype in ((DOCS_FILE, np.int32), (IMPACTS_FILE, np.float32)):
+        tmp_path = os.path.join(index_dir, f"{filename}.{os.getpid()}.tmp")
+        if n_postings:
+            outputs[filename] = (tmp_path, np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=(n_postings,)))
+        else:
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.empty(0, dtype=dtype))
+            outputs[filename] = (tmp_path, None)
+
+    for lo in range(0, len(terms), block_terms):
+        hi = min(lo + block_terms, len(terms))
+        block_term_ids, block_docs, block_tf = [], [], []
+        for run_terms, run_offsets, run_docs, run_tf in runs:
+            start = int(np.searchsorted(run_terms, terms[lo], side="left"))
+            end = int(np.searchsorted(run_terms, terms[hi - 1], side="right"))
+            if start == end:
+                continue
+            block_term_ids.append(np.repeat(np.searchsorted(terms, run_terms[start:end]), np.diff(run_offsets[start:end + 1])))
+            block_docs.append(np.asarray(run_docs[run_offsets[start]:run_offsets[end]]))
+            block_tf.append(np.asarray(run_tf[run_offsets[start]:run_offsets[end]]))
+
+        # 런이 문서 번호 순이므로 용어 기준 안정 정렬만으로 (용어, 문서) 순서가 됨
+        posting_terms = np.concatenate(block_term_ids)
+        order = np.argsort(posting_terms, kind="stable")
+        posting_terms = posting_terms[order]
+        docs = np.concatenate(block_docs)[order]
+        tf = np.concatenate(block_tf)[order]
+
+        norm = k1 * (1 - b + b * doc_len[docs] / max(avgdl, 1e-9))
+        impacts = (idf[posting_terms] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+        outputs[DOCS_FILE][1][offsets[lo]:offsets[hi]] = docs
+        outputs[IMPACTS_FILE][1][offsets[lo]:offsets[hi]] = impacts
+        max_impact[lo:hi] = np.maximum.reduceat(impacts, offsets[lo:hi] - offsets[lo])
+
+    for filename, (tmp_path, array) in outputs.items():
+        if array is not None:
+            array.flush()
+        os.replace(tmp_path, os.path.join(index_dir, filename))
+
+    _save(index_dir, TERMS_FILE, terms)
+    _save(index_dir, OFFSETS_FILE, offsets)
+    _save(index_dir, MAX_IMPACT_FILE, max_impact)
+    return _save_manifest(index_dir, len(terms), n_postings, manifest)
+
+
+def score_postings(terms, posting_terms, docs, tf, doc_len, k1=K1, b=B):
+    """용어/문서 빈도 → (오프셋, BM25 점수, 용어별 최대 점수)"""
+    n_docs = len(doc_len)
+    df = np.bincount(posting_terms, minlength=len(terms))
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(df, out=offsets[1:])
+    if len(docs) == 0:
+        empty = np.empty(0, dtype=np.float32)
+        return offsets, empty, empty
+
+    avgdl = float(doc_len.mean()) if n_docs else 0.0
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+    norm = k1 * (1 - b + b * doc_len[docs] / max(avgdl, 1e-9))
+    impacts = (idf[posting_terms] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+    max_impact = np.maximum.reduceat(impacts, offsets[:-1]).astype(np.float32)
+    return offsets, impacts, max_impact
+
+
+def build_postings(corpus, k1=K1, b=B):
+    """문서 목록 → (정렬된 용어, 오프셋, 문서 번호, BM25 점수, 용어별 최대 점수)"""
+    terms, posting_terms, docs, tf, doc_len = count_terms(corpus)
+    offsets, impacts, max_impact = score_postings(terms, posting_terms, docs, tf, doc_len, k1, b)
+    return terms, offsets, docs, impacts, max_impact
+
+
+def save_postings(index_dir, terms, offsets, docs, impacts, max_impact, manifest):
+    """포스팅 배열과 매니페스트 저장 - 매니페스트는 마지막에 기록"""
+    os.makedirs(index_dir, exist_ok=True)
+    _save(index_dir, TERMS_FILE, terms)
+    _save(index_dir, OFFSETS_FILE, offsets)
+    _save(index_dir, DOCS_FILE, docs)
+    _save(index_dir, IMPACTS_FILE, impacts)
+    _save(index_dir, MAX_IMPACT_FILE, max_impact)
+    return _save_manifest(index_dir, len(terms), len(docs), manifest)
+
+
+def _save_manifest(index_dir, n_terms, n_postings, manifest):
+    """매니페스트 기록 (포스팅 배열을 모두 저장한 뒤 호출)"""
+    manifest = {
+        "version": BM25_VERSION,
+        **manifest,
+        "n_terms": int(n_terms),
+        "n_postings": int(n_postings),
+        "k1": K1,
+        "b": B,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    manifest_tmp = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(manifest_tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_tmp, manifest_path)
+    return manifest
+
+
+def index_is_fresh(db_path=XLSX_PATH, index_dir=BM25_DIR):
+    """저장된 BM25 인덱스가 현재 엑셀 파일과 일치하는지 확인"""
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if manifest.get("version") != BM25_VERSION:
+        return False
+    if not os.path.exists(db_path):
+        return True
+    return manifest.get("source_sha256") == file_sha256(db_path)
+
+
+def build_bm25_index(db_path=XLSX_PATH, index_dir=BM25_DIR, parquet_path=PARQUET_PATH):
+    """프로젝트 제목으로 BM25 역색인을 만들어 디스크에 저장"""
+    started = time.time()
+    print(f"🏗️ BM25 인덱스 빌드 시작: {db_path} → {index_dir}")
+
+    df = ensure_store(db_path, parquet_path)
+    corpus = df['Project Title'].fillna("").astype(str).tolist()
+    terms, offsets, docs, impacts, max_impact = build_postings(corpus)
+    manifest = save_postings(index_dir, terms, offsets, docs, impacts, max_impact, {
+        "source_sha256": file_sha256(db_path) if os.path.exists(db_path) else None,
+        "n_docs": len(corpus),
+    })
+
+    print(f"✅ BM25 인덱스 빌드 완료: {manifest['n_terms']}개 용어, {manifest['n_postings']}개 포스팅 ({time.time() - started:.1f}초)")
+    return manifest
+
+
+class BM25Index:
+    """메모리 매핑된 BM25 역색인 - 질의 용어의 포스팅만 읽어 상위 k개 계산"""
+
+    def __init__(self, index_dir=BM25_DIR):
+        def _load(filename):
+            return np.load(os.path.join(index_dir, filename), mmap_mode='r')
+
+        with open(os.path.join(index_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.n_docs = self.manifest["n_docs"]
+        self.terms = _load(TERMS_FILE)
+        self.offsets = _load(OFFSETS_FILE)
+        self.docs = _load(DOCS_FILE)
+        self.impacts = _load(IMPACTS_FILE)
+        self.max_impact = _load(MAX_IMPACT_FILE)
+
+    def term_id(self, term):
+        """정렬된 용어 배열에서 이진 탐색 (없으면 -1)"""
+        pos = int(np.searchsorted(self.terms, term))
+        if pos < len(self.terms) and self.terms[pos] == term:
+            return pos
+        return -1
+
+    def postings(self, term_id):
+        """용어의 (문서 번호, BM25 점수) 포스팅"""
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.docs[start:end], self.impacts[start:end]
+
+    def search(self, query, k=10, mask=None):
+        """BM25 상위 k개 (문서 번호, 점수)를 점수 내림차순으로 반환
+
+        max-score 방식 조기 종료: 남은 용어들의 최대 점수 합이 현재 k번째 점수 이하가 되면
+        더 이상 새 문서를 후보에 넣지 않고, 기존 후보의 점수만 이진 탐색으로 보정
+        """
+        # 질의 용어별 가중치 (같은 단어가 여러 번 나오면 그만큼 반영)
+        weights = {}
+        for token in tokenize(query):
+            tid = self.term_id(token)
+            if tid >= 0:
+                weights[tid] = weights.get(tid, 0) + 1
+        if not weights or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        # 최대 기여도가 큰 용어부터 처리
+        query_terms = sorted(weights, key=lambda t: -weights[t] * float(self.max_impact[t]))
+        upper = np.array([weights[t] * float(self.max_impact[t]) for t in query_terms])
+        remaining = np.concatenate([np.cumsum(upper[::-1])[::-1][1:], [0.0]])
+
+        cand_ids = np.empty(0, dtype=np.int64)
+        cand_scores = np.empty(0, dtype=np.float64)
+        theta = 0.0
+        for i, tid in enumerate(query_terms):
+            docs, impacts = self.postings(tid)
+            if i == 0 or upper[i] + remaining[i] > theta:
+                # 필수 용어: 포스팅 전체를 후보와 병합
+                contrib = impacts.astype(np.float64) * weights[tid]
+                if mask is not None:
+                    keep = mask[docs]
+                    docs, contrib = docs[keep], contrib[keep]
+                ids = np.concatenate([cand_ids, docs.astype(np.int64)])
+                scores = np.concatenate([cand_scores, contrib])
+                cand_ids, inverse = np.unique(ids, return_inverse=True)
+                cand_scores = np.bincount(inverse, weights=scores)
+            else:
+                # 비필수 용어: 기존 후보에 대해서만 점수 보정 (찾은 위치의 점수만 읽음)
+                pos = np.searchsorted(docs, cand_ids)
+                found = pos < len(docs)
+                found[found] = docs[pos[found]] == cand_ids[found]
+                cand_scores[found] += impacts[pos[found]].astype(np.float64) * weights[tid]
+
+            if len(cand_scores) >= k:
+                theta = float(np.partition(cand_scores, len(cand_scores) - k)[len(cand_scores) - k])
+                # 남은 용어를 모두 더해도 k번째에 못 미치는 후보는 제거
+                alive = cand_scores + remaining[i] >= theta
+                cand_ids, cand_scores = cand_ids[alive], cand_scores[alive]
+
+        if len(cand_ids) > k:
+            top = np.argpartition(-cand_scores, k - 1)[:k]
+            cand_ids, cand_scores = cand_ids[top], cand_scores[top]
+        order = np.lexsort((cand_ids, -cand_scores))
+        return cand_ids[order], cand_scores[order]
+
+    def score_docs(self, query, doc_ids):
+        """주어진 문서들의 BM25 점수 - 질의 용어 포스팅에서 찾은 위치의 점수만 읽음"""
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        scores = np.zeros(len(doc_ids), dtype=np.float64)
+        for token in tokenize(query):
+            tid = self.term_id(token)
+            if tid < 0:
+                continue
+            docs, impacts = self.postings(tid)
+            pos = np.searchsorted(docs, doc_ids)
+            found = pos < len(docs)
+            found[found] = docs[pos[found]] == doc_ids[found]
+            scores[found] += impacts[pos[found]]
+        return scores
+
+    def matching_docs(self, query):
+        """질의 용어가 하나라도 들어 있는 문서 번호 (오름차순) - 패싯 개수 계산용"""
+        term_ids = {self.term_id(token) for token in tokenize(query)} - {-1}
+        if not term_ids:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([self.postings(tid)[0] for tid in term_ids])).astype(np.int64)
+
+
+def load_or_build_bm25_index(db_path=XLSX_PATH, index_dir=BM25_DIR):
+    """BM25 인덱스가 없거나 엑셀 해시가 바뀌었으면 재빌드 후 로드"""
+    if not index_is_fresh(db_path, index_dir):
+        print("🔄 BM25 인덱스가 없거나 원본 DB가 변경됨 → 재빌드")
+        build_bm25_index(db_path, index_dir)
+    return BM25Index(index_dir)
+
+
+if __name__ == "__main__":
+    # 오프라인 빌드: python -m utils.bm25_index [--force]
+    parser = argparse.ArgumentParser(description="ISEF DB BM25 역색인 빌드")
+    parser.add_argument("--db", default=XLSX_PATH, help="원본 엑셀 경로")
+    parser.add_argument("--out", default=BM25_DIR, help="인덱스 저장 디렉터리")
+    parser.add_argument("--force", action="store_true", help="해시가 같아도 다시 빌드")
+    args = parser.parse_args()
+
+    if args.force or not index_is_fresh(args.db, args.out):
+        build_bm25_index(args.db, args.out)
+    else:
+        print("✅ BM25 인덱스가 최신 상태입니다. (--force 로 강제 재빌드)")
@@ -0,0 +1,193 @@
+import json
+import os
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from utils.db_store import PARQUET_PATH, XLSX_PATH, ensure_store, file_sha256
+from utils.facet_index import FacetIndex, build_facets, save_facets
+
+# 📁 원본 DB 및 인덱스 저장 경로
+DEFAULT_DB_PATH = XLSX_PATH
+INDEX_DIR = os.path.join("data", "index")
+
+# 인덱스 포맷 버전 - 저장 구조가 바뀌면 올려서 자동 재빌드
+INDEX_VERSION = 3
+
+# 벡터라이저 설정 (빌드/로드 시 동일하게 사용)
+VECTORIZER_PARAMS = {
+    "analyzer": "word",
+    "ngram_range": (1, 2),
+    "lowercase": True,
+}
+MAX_FEATURES = 5000  # 성능 최적화
+
+MANIFEST_FILE = "manifest.json"
+META_FILE = "meta.parquet"
+VOCAB_FILE = "vocab.npy"
+IDF_FILE = "idf.npy"
+DATA_FILE = "tfidf_data.npy"
+INDICES_FILE = "tfidf_indices.npy"
+INDPTR_FILE = "tfidf_indptr.npy"
+
+
+def read_manifest(index_dir=INDEX_DIR):
+    """인덱스 매니페스트 읽기 (없으면 None)"""
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 인덱스 매니페스트 읽기 실패: {e}")
+        return None
+
+
+def index_is_fresh(db_path=DEFAULT_DB_PATH, index_dir=INDEX_DIR):
+    """저장된 인덱스가 현재 엑셀 파일과 일치하는지 확인"""
+    manifest = read_manifest(index_dir)
+    if manifest is None or manifest.get("version") != INDEX_VERSION:
+        return False
+    # 원본 엑셀이 없으면 (배포 환경 등) 기존 인덱스를 그대로 사용
+    if not os.path.exists(db_path):
+        return True
+    return manifest.get("source_sha256") == file_sha256(db_path)
+
+
+def _atomic_save(index_dir, filename, array):
+    """임시 파일에 저장 후 교체 - 다른 프로세스가 매핑 중인 파일은 그대로 유지됨"""
+    path = os.path.join(index_dir, filename)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def save_matrix(index_dir, matrix, dtype=np.float64):
+    """CSR 행렬을 세 개의 배열 파일로 저장"""
+    _atomic_save(index_dir, DATA_FILE, matrix.data.astype(dtype))
+    _atomic_save(index_dir, INDICES_FILE, matrix.indices.astype(np.int32))
+    _atomic_save(index_dir, INDPTR_FILE, matrix.indptr.astype(np.int32))
+
+
+def load_matrix(index_dir, shape):
+    """저장된 CSR 배열을 메모리 매핑으로 로드 - 복사 없이 매핑된 페이지를 그대로 사용 (프로세스 간 페이지 캐시 공유)"""
+    def _load(filename):
+        return np.load(os.path.join(index_dir, filename), mmap_mode='r')
+
+    return sparse.csr_matrix(
+        (_load(DATA_FILE), _load(INDICES_FILE), _load(INDPTR_FILE)),
+        shape=shape,
+        copy=False,
+    )
+
+
+def build_index(db_path=DEFAULT_DB_PATH, index_dir=INDEX_DIR, parquet_path=PARQUET_PATH):
+    """프로젝트 DB를 읽어 TF-IDF 인덱스를 학습하고 디스크에 저장"""
+    started = time.time()
+    print(f"🏗️ 인덱스 빌드 시작: {db_path} → {index_dir}")
+
+    # 엑셀이 바뀌었으면 Parquet 저장소부터 갱신
+    df = ensure_store(db_path, parquet_path)
+    source_sha256 = file_sha256(db_path) if os.path.exists(db_path) else None
+    corpus = df['Project Title'].fillna("").astype(str).tolist()
+
+    vectorizer = TfidfVectorizer(max_features=MAX_FEATURES, **VECTORIZER_PARAMS)
+    matrix = vectorizer.fit_transform(corpus).tocsr()
+    matrix.sort_indices()
+
+    os.makedirs(index_dir, exist_ok=True)
+    _atomic_save(index_dir, VOCAB_FILE, np.asarray(vectorizer.get_feature_names_out(), dtype=str))
+    _atomic_save(index_dir, IDF_FILE, vectorizer.idf_.astype(np.float64))
+    save_matrix(index_dir, matrix)
+
+    # 패싯 필터용 값별 행 번호 목록 (분야, 연도, 국가, 수상 여부)
+    facets = build_facets(df)
+    save_facets(facets, index_dir, _atomic_save)
+
+    meta_path = os.path.join(index_dir, META_FILE)
+    meta_tmp = f"{meta_path}.{os.getpid()}.tmp"
+    df.to_parquet(meta_tmp, index=False)
+    os.replace(meta_tmp, meta_path)
+
+    # 매니페스트는 마지막에 기록 - 매니페스트가 있으면 나머지 파일도 완성된 상태
+    manifest = {
+        "version": INDEX_VERSION,
+        "source_path": db_path,
+        "source_sha256": source_sha256,
+        "n_rows": int(matrix.shape[0]),
+        "n_features": int(matrix.shape[1]),
+        "nnz": int(matrix.nnz),
+        "facets": {facet: len(values) for facet, (values, _, _) in facets.items()},
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    manifest_tmp = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(manifest_tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_tmp, manifest_path)
+
+    print(f"✅ 인덱스 빌드 완료: {manifest['n_rows']}행, {manifest['n_features']}개 특성 ({time.time() - started:.1f}초)")
+    return manifest
+
+
+def load_index(index_dir=INDEX_DIR):
+    """저장된 인덱스를 메모리 매핑으로 로드 - (DataFrame, 벡터라이저, CSR 행렬) 반환"""
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"인덱스가 없습니다: {index_dir}")
+
+    matrix = load_matrix(index_dir, (manifest["n_rows"], manifest["n_features"]))
+    vectorizer = load_vectorizer(index_dir)
+    return load_meta(index_dir), vectorizer, matrix
+
+
+def load_meta(index_dir=INDEX_DIR):
+    """인덱스와 같은 행 순서로 저장된 프로젝트 메타데이터"""
+    return pd.read_parquet(os.path.join(index_dir, META_FILE))
+
+
+def load_vectorizer(index_dir=INDEX_DIR):
+    """저장된 어휘/IDF로 학습된 상태의 벡터라이저 복원 (다시 학습하지 않음)"""
+    terms = np.load(os.path.join(index_dir, VOCAB_FILE))
+    vectorizer = TfidfVectorizer(
+        vocabulary={term: i for i, term in enumerate(terms.tolist())},
+        **VECTORIZER_PARAMS,
+    )
+    vectorizer.idf_ = np.load(os.path.join(index_dir, IDF_FILE))
+    return vectorizer
+
+
+def load_facet_index(index_dir=INDEX_DIR):
+    """저장된 패싯 색인 로드 (인덱스와 같은 행 순서)"""
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"인덱스가 없습니다: {index_dir}")
+    return FacetIndex.load(index_dir, manifest["n_rows"])
+
+
+def load_or_build_index(db_path=DEFAULT_DB_PATH, index_dir=INDEX_DIR):
+    """인덱스가 없거나 엑셀 해시가 바뀌었으면 재빌드 후 로드"""
+    if not index_is_fresh(db_path, index_dir):
+        print("🔄 인덱스가 없거나 원본 DB가 변경됨 → 재빌드")
+        build_index(db_path, index_dir)
+    return load_index(index_dir)
+
+
+if __name__ == "__main__":
+    # 오프라인 빌드: python -m utils.db_index [--force]
+    parser = argparse.ArgumentParser(description="ISEF DB TF-IDF 인덱스 빌드")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="원본 엑셀 경로")
+    parser.add_argument("--out", default=INDEX_DIR, help="인덱스 저장 디렉터리")
+    parser.add_argument("--force", action="store_true", help="해시가 같아도 다시 빌드")
+    args = parser.parse_args()
+
+    if args.force or not index_is_fresh(args.db, args.out):
+        build_index(args.db, args.out)
+    else:
+        print("✅ 인덱스가 최신 상태입니다. (--force 로 강제 재빌드)")
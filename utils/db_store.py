@@ -0,0 +1,133 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 📁 원본 엑셀과 컬럼형(Parquet) 저장소 경로
+XLSX_PATH = os.path.join("data", "ISEF Final DB.xlsx")
+PARQUET_PATH = os.path.join("data", "isef_db.parquet")
+
+# 반복값이 많은 문자열 컬럼 → 사전 인코딩(category)으로 저장
+CATEGORICAL_COLUMNS = ['대회명', 'Category', 'Fair Country', 'Fair State', 'Fair Province', 'Awards Won']
+YEAR_COLUMN = 'Year'
+
+# Parquet 스키마 메타데이터 키 (원본 엑셀 해시 기록용)
+_SOURCE_HASH_KEY = b"source_sha256"
+# 이미 저장소에 합쳐진 추가 세그먼트 ID 목록 (병합을 두 번 해도 행이 중복되지 않도록)
+_MERGED_SEGMENTS_KEY = b"merged_segments"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """파일 내용의 SHA-256 해시 계산"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def to_typed_frame(df):
+    """엑셀에서 읽은 DataFrame을 컬럼 타입에 맞게 변환 (연도 int16, 범주형 사전 인코딩)"""
+    df = df.copy()
+    if YEAR_COLUMN in df.columns:
+        # 중간에 섞인 헤더 행('Year') 등 숫자가 아닌 값은 결측 처리
+        df[YEAR_COLUMN] = pd.to_numeric(df[YEAR_COLUMN], errors='coerce').astype('Int16')
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            # 숫자/문자 혼합 컬럼도 문자열로 통일한 뒤 범주형으로 변환
+            df[col] = df[col].astype('string').astype('category')
+    return df
+
+
+def read_source_hash(parquet_path=PARQUET_PATH):
+    """Parquet 파일에 기록된 원본 엑셀 해시 (없으면 None)"""
+    try:
+        metadata = pq.read_schema(parquet_path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    value = metadata.get(_SOURCE_HASH_KEY)
+    return value.decode() if value else None
+
+
+def read_merged_segments(parquet_path=PARQUET_PATH):
+    """Parquet 파일에 기록된 병합 완료 세그먼트 ID 목록 (없으면 빈 목록)"""
+    try:
+        metadata = pq.read_schema(parquet_path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return []
+    value = metadata.get(_MERGED_SEGMENTS_KEY)
+    return json.loads(value.decode()) if value else []
+
+
+def store_is_fresh(xlsx_path=XLSX_PATH, parquet_path=PARQUET_PATH):
+    """Parquet 저장소가 현재 엑셀 파일과 일치하는지 확인"""
+    if not os.path.exists(parquet_path):
+        return False
+    # 원본 엑셀이 없으면 (배포 환경 등) 기존 저장소를 그대로 사용
+    if not os.path.exists(xlsx_path):
+        return True
+    return read_source_hash(parquet_path) == file_sha256(xlsx_path)
+
+
+def ingest_workbook(xlsx_path=XLSX_PATH, parquet_path=PARQUET_PATH):
+    """엑셀 워크북을 타입이 지정된 Parquet 파일로 변환"""
+    started = time.time()
+    print(f"🏗️ DB 변환 시작: {xlsx_path} → {parquet_path}")
+
+    df = to_typed_frame(pd.read_excel(xlsx_path))
+    write_store(df, parquet_path, file_sha256(xlsx_path))
+
+    print(f"✅ DB 변환 완료: {len(df)}행 ({time.time() - started:.1f}초)")
+    return df
+
+
+def write_store(df, parquet_path=PARQUET_PATH, source_sha256=None, merged_segments=None):
+    """DataFrame을 Parquet 저장소로 기록 (원본 엑셀 해시와 병합된 세그먼트 ID를 스키마 메타데이터에 남김)"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    if source_sha256:
+        metadata[_SOURCE_HASH_KEY] = source_sha256.encode()
+    if merged_segments:
+        # 행과 같은 파일에 기록 - 행 추가와 ID 기록이 한 번의 교체로 함께 반영됨
+        metadata[_MERGED_SEGMENTS_KEY] = json.dumps(sorted(merged_segments)).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # 임시 파일에 쓴 뒤 교체 - 읽는 중인 다른 프로세스에 영향 없음
+    os.makedirs(os.path.dirname(parquet_path) or ".", exist_ok=True)
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, parquet_path)
+
+
+def load_projects(parquet_path=PARQUET_PATH, xlsx_path=XLSX_PATH):
+    """프로젝트 DB 로드 - Parquet 우선, 없을 때만 엑셀로 폴백"""
+    if os.path.exists(parquet_path):
+        return pd.read_parquet(parquet_path)
+    print(f"⚠️ Parquet 저장소 없음, 엑셀에서 직접 로드: {xlsx_path}")
+    return to_typed_frame(pd.read_excel(xlsx_path))
+
+
+def ensure_store(xlsx_path=XLSX_PATH, parquet_path=PARQUET_PATH):
+    """저장소가 없거나 엑셀이 변경되었으면 다시 변환 후 로드"""
+    if not store_is_fresh(xlsx_path, parquet_path):
+        return ingest_workbook(xlsx_path, parquet_path)
+    return load_projects(parquet_path, xlsx_path)
+
+
+if __name__ == "__main__":
+    # 오프라인 변환: python -m utils.db_store [--force]
+    parser = argparse.ArgumentParser(description="ISEF 엑셀 DB → Parquet 변환")
+    parser.add_argument("--xlsx", default=XLSX_PATH, help="원본 엑셀 경로")
+    parser.add_argument("--out", default=PARQUET_PATH, help="Parquet 저장 경로")
+    parser.add_argument("--force", action="store_true", help="해시가 같아도 다시 변환")
+    args = parser.parse_args()
+
+    if args.force or not store_is_fresh(args.xlsx, args.out):
+        ingest_workbook(args.xlsx, args.out)
+    else:
+        print("✅ Parquet 저장소가 최신 상태입니다. (--force 로 강제 변환)")
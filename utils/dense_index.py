@@ -0,0 +1,268 @@
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+
+from utils.db_store import PARQUET_PATH, XLSX_PATH, ensure_store, file_sha256
+
+# 📁 임베딩 인덱스 저장 경로 (인코더별 하위 디렉터리)
+DENSE_DIR = os.path.join("data", "index", "dense")
+
+# 인덱스 포맷 버전 - 저장 구조가 바뀌면 올려서 자동 재빌드
+DENSE_VERSION = 1
+
+# 🔧 인코더/인덱스 종류 설정
+DEFAULT_ENCODER = os.environ.get("LSAI_DENSE_ENCODER", "sentence-transformers").strip().lower()
+DEFAULT_INDEX_TYPE = os.environ.get("LSAI_DENSE_INDEX", "hnsw").strip().lower()
+SENTENCE_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+# 오프라인 빌드 배치 크기
+BATCH_SIZE = 256
+
+# HNSW / IVF 파라미터
+HNSW_M = 32
+HNSW_EF_SEARCH = 64
+IVF_NPROBE = 16
+
+# 임베딩 코사인 점수는 범위가 달라 0보다 큰 결과를 모두 후보로 사용
+SCORE_THRESHOLDS = (0.0,)
+
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.faiss"
+
+_TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+
+class HashingEncoder:
+    """모델 다운로드 없이 동작하는 결정적 로컬 인코더 (단어 + 문자 3-gram 해싱)"""
+
+    name = "hashing"
+
+    def __init__(self, dim=256):
+        self.dim = dim
+
+    def _features(self, text):
+        text = str(text).lower()
+        for token in _TOKEN_PATTERN.findall(text):
+            yield "w:" + token
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                yield "c:" + padded[i:i + 3]
+
+    def encode(self, texts):
+        """텍스트 목록 → L2 정규화된 float32 벡터 (n, dim)"""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                # 상위 비트로 부호를 정해 해시 충돌 편향 상쇄
+                vectors[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+class SentenceTransformerEncoder:
+    """sentence-transformers 다국어 모델 인코더 (첫 사용 시 모델 로드)"""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name=SENTENCE_MODEL):
+        self.model_name = model_name
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    @property
+    def dim(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts):
+        """텍스트 목록 → L2 정규화된 float32 벡터"""
+        vectors = self.model.encode(list(texts), batch_size=BATCH_SIZE, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+ENCODERS = {
+    HashingEncoder.name: HashingEncoder,
+    SentenceTransformerEncoder.name: SentenceTransformerEncoder,
+}
+
+
+def get_encoder(name=DEFAULT_ENCODER):
+    """이름으로 인코더 생성"""
+    if name not in ENCODERS:
+        raise ValueError(f"알 수 없는 인코더: {name} (사용 가능: {', '.join(ENCODERS)})")
+    return ENCODERS[name]()
+
+
+def encoder_dir(encoder, base_dir=DENSE_DIR):
+    """인코더별 인덱스 디렉터리"""
+    return os.path.join(base_dir, encoder.name)
+
+
+def _new_faiss_index(dim, n_rows, index_type):
+    """내적(=정규화 벡터의 코사인) 기반 HNSW 또는 IVF 인덱스 생성"""
+    import faiss
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 2 * HNSW_M
+        return index
+    if index_type == "ivf":
+        # 클러스터당 학습 벡터가 39개 이상 되도록 제한
+        nlist = max(1, min(int(4 * np.sqrt(n_rows)), n_rows // 39))
+        quantizer = faiss.IndexFlatIP(dim)
+        return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+    raise ValueError(f"알 수 없는 인덱스 종류: {index_type} (hnsw 또는 ivf)")
+
+
+def read_manifest(index_dir):
+    """매니페스트 읽기 (없으면 None)"""
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def index_is_fresh(encoder, db_path=XLSX_PATH, base_dir=DENSE_DIR, index_type=DEFAULT_INDEX_TYPE):
+    """저장된 임베딩 인덱스가 현재 엑셀/설정과 일치하는지 확인"""
+    manifest = read_manifest(encoder_dir(encoder, base_dir))
+    if manifest is None or manifest.get("version") != DENSE_VERSION:
+        return False
+    if manifest.get("index_type") != index_type:
+        return False
+    if not os.path.exists(db_path):
+        return True
+    return manifest.get("source_sha256") == file_sha256(db_path)
+
+
+def build_dense_index(encoder, db_path=XLSX_PATH, base_dir=DENSE_DIR,
+                      index_type=DEFAULT_INDEX_TYPE, batch_size=BATCH_SIZE, parquet_path=PARQUET_PATH):
+    """프로젝트 제목을 배치로 임베딩해 faiss 인덱스로 저장 (행 번호 = faiss id)"""
+    import faiss
+
+    started = time.time()
+    index_dir = encoder_dir(encoder, base_dir)
+    print(f"🏗️ 임베딩 인덱스 빌드 시작: {encoder.name}/{index_type} → {index_dir}")
+
+    df = ensure_store(db_path, parquet_path)
+    corpus = df['Project Title'].fillna("").astype(str).tolist()
+
+    # 배치 단위 인코딩 - 전체 텍스트를 한 번에 모델에 넣지 않음
+    batches = []
+    for start in range(0, len(corpus), batch_size):
+        batches.append(encoder.encode(corpus[start:start + batch_size]))
+        print(f"   🔢 인코딩 {min(start + batch_size, len(corpus))}/{len(corpus)}")
+    vectors = np.ascontiguousarray(np.vstack(batches), dtype=np.float32)
+
+    index = _new_faiss_index(vectors.shape[1], len(vectors), index_type)
+    if not index.is_trained:
+        index.train(vectors)
+    for start in range(0, len(vectors), batch_size):
+        index.add(vectors[start:start + batch_size])
+
+    os.makedirs(index_dir, exist_ok=True)
+    index_path = os.path.join(index_dir, INDEX_FILE)
+    index_tmp = f"{index_path}.{os.getpid()}.tmp"
+    faiss.write_index(index, index_tmp)
+    os.replace(index_tmp, index_path)
+
+    manifest = {
+        "version": DENSE_VERSION,
+        "encoder": encoder.name,
+        "index_type": index_type,
+        "dim": int(vectors.shape[1]),
+        "n_rows": int(len(vectors)),
+        "source_sha256": file_sha256(db_path) if os.path.exists(db_path) else None,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    manifest_tmp = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(manifest_tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_tmp, manifest_path)
+
+    print(f"✅ 임베딩 인덱스 빌드 완료: {manifest['n_rows']}행, {manifest['dim']}차원 ({time.time() - started:.1f}초)")
+    return manifest
+
+
+class DenseIndex:
+    """faiss k-NN 인덱스 + 질의 인코더"""
+
+    def __init__(self, encoder, base_dir=DENSE_DIR):
+        import faiss
+
+        index_dir = encoder_dir(encoder, base_dir)
+        self.encoder = encoder
+        self.manifest = read_manifest(index_dir)
+        if self.manifest is None:
+            raise FileNotFoundError(f"임베딩 인덱스가 없습니다: {index_dir}")
+        self.index = faiss.read_index(os.path.join(index_dir, INDEX_FILE))
+        if self.manifest["index_type"] == "hnsw":
+            self.index.hnsw.efSearch = HNSW_EF_SEARCH
+        else:
+            self.index.nprobe = IVF_NPROBE
+
+    def search(self, query, k=10, mask=None):
+        """질의 임베딩의 k-NN (행 번호, 코사인 점수)를 점수 내림차순으로 반환
+
+        mask(행별 bool 배열)를 주면 탐색 중에 해당 행만 후보로 사용 (faiss ID 선택자)
+        """
+        return self.search_vector(self.encoder.encode([query]), k, mask)
+
+    def search_vector(self, vector, k=10, mask=None):
+        """인코딩된 질의 벡터 (1 × dim)로 k-NN 검색"""
+        import faiss
+
+        if mask is None:
+            scores, ids = self.index.search(vector, k)
+        else:
+            bitmap = np.packbits(np.asarray(mask, dtype=bool), bitorder='little')
+            selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+            if self.manifest["index_type"] == "hnsw":
+                params = faiss.SearchParametersHNSW(sel=selector, efSearch=HNSW_EF_SEARCH)
+            else:
+                params = faiss.SearchParametersIVF(sel=selector, nprobe=IVF_NPROBE)
+            scores, ids = self.index.search(vector, k, params=params)
+        keep = ids[0] >= 0
+        return ids[0][keep].astype(np.int64), scores[0][keep]
+
+
+def load_or_build_dense_index(encoder, db_path=XLSX_PATH, base_dir=DENSE_DIR, index_type=DEFAULT_INDEX_TYPE):
+    """임베딩 인덱스가 없거나 엑셀/설정이 바뀌었으면 재빌드 후 로드"""
+    if not index_is_fresh(encoder, db_path, base_dir, index_type):
+        print("🔄 임베딩 인덱스가 없거나 원본 DB가 변경됨 → 재빌드")
+        build_dense_index(encoder, db_path, base_dir, index_type)
+    return DenseIndex(encoder, base_dir)
+
+
+if __name__ == "__main__":
+    # 오프라인 빌드: python -m utils.dense_index --encoder sentence-transformers --type hnsw
+    parser = argparse.ArgumentParser(description="ISEF DB 임베딩(faiss) 인덱스 빌드")
+    parser.add_argument("--db", default=XLSX_PATH, help="원본 엑셀 경로")
+    parser.add_argument("--out", default=DENSE_DIR, help="인덱스 저장 디렉터리")
+    parser.add_argument("--encoder", default=DEFAULT_ENCODER, choices=sorted(ENCODERS), help="인코더")
+    parser.add_argument("--type", default=DEFAULT_INDEX_TYPE, choices=["hnsw", "ivf"], help="faiss 인덱스 종류")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="인코딩 배치 크기")
+    parser.add_argument("--force", action="store_true", help="해시가 같아도 다시 빌드")
+    args = parser.parse_args()
+
+    encoder = get_encoder(args.encoder)
+    if args.force or not index_is_fresh(encoder, args.db, args.out, args.type):
+        build_dense_index(encoder, args.db, args.out, args.type, args.batch_size)
+    else:
+        print("✅ 임베딩 인덱스가 최신 상태입니다. (--force 로 강제 재빌드)")
@@ -0,0 +1,225 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# 🎛️ 패싯 색인 - 값별로 정렬된 행 번호 목록 (인덱스 빌드 시 함께 저장)
+# 이름 → 원본 컬럼 (award는 'Awards Won' 값이 있으면 수상)
+FACET_COLUMNS = {
+    "category": "Category",
+    "year": "Year",
+    "country": "Fair Country",
+    "award": "Awards Won",
+}
+FACETS = tuple(FACET_COLUMNS)
+
+VALUES_FILE = "facet_{}_values.npy"
+OFFSETS_FILE = "facet_{}_offsets.npy"
+ROWS_FILE = "facet_{}_rows.npy"
+
+
+def _facet_values(df, facet):
+    """컬럼 → 행별 패싯 값 Series (값이 없으면 NA)"""
+    column = FACET_COLUMNS[facet]
+    if column not in df.columns:
+        return pd.Series(pd.NA, index=df.index, dtype=object)
+    series = df[column]
+    if facet == "award":
+        # 빈 문자열도 미수상으로 처리
+        return series.notna() & (series.astype(str).str.strip() != "")
+    if facet == "year":
+        return pd.to_numeric(series, errors="coerce").astype("Int32")
+    values = series.astype(object).where(series.notna())
+    return values.map(lambda v: v.strip() if isinstance(v, str) else v).replace("", pd.NA)
+
+
+def build_facets(df):
+    """DataFrame → {패싯: (값 배열, 값별 시작 위치, 값 순서로 묶인 행 번호)}
+
+    행 번호는 값 안에서 오름차순이라 값 하나의 행 목록이 rows[offsets[v]:offsets[v+1]] 한 구간
+    값 배열도 정렬되어 있어 연도 범위는 연속된 값 구간 = 연속된 행 구간
+    """
+    facets = {}
+    for facet in FACETS:
+        series = _facet_values(df, facet)
+        present = series.notna().to_numpy()
+        rows = np.flatnonzero(present).astype(np.int32)
+        raw = series.to_numpy()[present]
+        if facet == "year":
+            raw = raw.astype(np.int32)
+        elif facet == "award":
+            raw = raw.astype(bool)
+        else:
+            raw = raw.astype(str)
+        values, codes = np.unique(raw, return_inverse=True)
+        order = np.argsort(codes, kind="stable")  # 값 순서로 묶고 행 번호 순서는 유지
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(values)))]).astype(np.int64)
+        facets[facet] = (values, offsets, rows[order])
+    return facets
+
+
+def save_facets(facets, index_dir, save):
+    """패싯 배열 저장 (save: 인덱스 모듈의 원자적 저장 함수)"""
+    for facet, (values, offsets, rows) in facets.items():
+        save(index_dir, VALUES_FILE.format(facet), values)
+        save(index_dir, OFFSETS_FILE.format(facet), offsets)
+        save(index_dir, ROWS_FILE.format(facet), rows)
+
+
+def merge_facets(parts):
+    """[(패싯 배열, 행 번호 시작 위치)] → 하나의 패싯 배열 (기본 인덱스 + 추가 세그먼트 합치기)"""
+    merged = {}
+    for facet in FACETS:
+        values = np.unique(np.concatenate([facets[facet][0] for facets, _ in parts]))
+        codes, rows = [], []
+        for facets, row_offset in parts:
+            part_values, offsets, part_rows = facets[facet]
+            remap = np.searchsorted(values, part_values)
+            codes.append(np.repeat(remap, np.diff(offsets)))
+            rows.append(np.asarray(part_rows, dtype=np.int64) + row_offset)
+        codes, rows = np.concatenate(codes), np.concatenate(rows)
+        order = np.lexsort((rows, codes))
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(values)))]).astype(np.int64)
+        merged[facet] = (values, offsets, rows[order].astype(np.int32))
+    return merged
+
+
+def load_facets(index_dir):
+    """저장된 패싯 배열을 메모리 매핑으로 로드"""
+    facets = {}
+    for facet in FACETS:
+        def _load(pattern, mmap_mode='r'):
+            return np.load(os.path.join(index_dir, pattern.format(facet)), mmap_mode=mmap_mode)
+        facets[facet] = (_load(VALUES_FILE, None), _load(OFFSETS_FILE), _load(ROWS_FILE))
+    return facets
+
+
+def filters_key(filters):
+    """필터 → 캐시 키로 쓸 수 있는 정규화된 튜플 (빈 조건은 제외)"""
+    if not filters:
+        return ()
+    items = []
+    for facet in sorted(filters):
+        spec = filters[facet]
+        if spec is None:
+            continue
+        if isinstance(spec, tuple):
+            items.append((facet, "range", spec))
+        elif isinstance(spec, (str, bool, int, np.integer)):
+            items.append((facet, "in", (spec,)))
+        else:
+            items.append((facet, "in", tuple(sorted(spec, key=str))))
+    return tuple(items)
+
+
+class FacetIndex:
+    """패싯 값별 행 번호 목록 - 필터 마스크와 검색 결과의 패싯별 개수 계산
+
+    필터 형식 (패싯끼리는 AND, 한 패싯 안의 여러 값은 OR):
+        {"category": "Plant Sciences" 또는 [...], "country": ...,
+         "year": 2020, [2019, 2021] 또는 (2018, 2022) 범위 (끝 포함, None이면 열린 범위),
+         "award": True (수상) / False (미수상)}
+    """
+
+    def __init__(self, facets, n_rows):
+        self.facets = facets
+        self.n_rows = n_rows
+        self._codes = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        """DataFrame에서 바로 구성 (저장된 인덱스가 없을 때)"""
+        return cls(build_facets(df), len(df))
+
+    @classmethod
+    def load(cls, index_dir, n_rows):
+        return cls(load_facets(index_dir), n_rows)
+
+    def values(self, facet):
+        """패싯의 모든 값 (정렬됨)"""
+        return self.facets[facet][0].tolist()
+
+    def codes(self, facet):
+        """행별 값 번호 배열 (값이 없으면 -1) - 처음 요청할 때 행 목록에서 한 번만 만듦"""
+        codes = self._codes.get(facet)
+        if codes is None:
+            values, offsets, rows = self.facets[facet]
+            codes = np.full(self.n_rows, -1, dtype=np.int32)
+            codes[rows] = np.repeat(np.arange(len(values), dtype=np.int32), np.diff(offsets))
+            self._codes[facet] = codes
+        return codes
+
+    def _value_ids(self, facet, spec):
+        """필터 조건 → 해당하는 값 번호 배열"""
+        values = self.facets[facet][0]
+        if isinstance(spec, tuple):
+            if facet != "year" or len(spec) != 2:
+                raise ValueError(f"범위 필터는 year에만 (시작, 끝) 형식으로 사용: {facet}={spec!r}")
+            start, end = spec
+            lo = 0 if start is None else np.searchsorted(values, int(start), side="left")
+            hi = len(values) if end is None else np.searchsorted(values, int(end), side="right")
+            return np.arange(lo, max(lo, hi))
+        if isinstance(spec, (str, bool, int, np.integer)):
+            spec = [spec]
+        if facet == "year":
+            wanted = np.asarray([int(v) for v in spec], dtype=values.dtype)
+        elif facet == "award":
+            wanted = np.asarray([bool(v) for v in spec], dtype=bool)
+        else:
+            wanted = np.asarray([str(v) for v in spec])
+        pos = np.searchsorted(values, wanted)
+        found = pos < len(values)
+        found[found] = values[pos[found]] == wanted[found]
+        return np.unique(pos[found])
+
+    def rows(self, facet, spec):
+        """조건에 맞는 행 번호 (오름차순)"""
+        if facet not in self.facets:
+            raise ValueError(f"알 수 없는 패싯: {facet} (사용 가능: {', '.join(FACETS)})")
+        _, offsets, rows = self.facets[facet]
+        ids = self._value_ids(facet, spec)
+        if len(ids) == 0:
+            return np.empty(0, dtype=np.int32)
+        if len(ids) == ids[-1] - ids[0] + 1:
+            # 연속된 값 (연도 범위 등) - 한 구간을 그대로 사용
+            return np.sort(rows[offsets[ids[0]]:offsets[ids[-1] + 1]])
+        return np.sort(np.concatenate([rows[offsets[v]:offsets[v + 1]] for v in ids]))
+
+    def _facet_masks(self, filters):
+        masks = {}
+        for facet, spec in (filters or {}).items():
+            if spec is None:
+                continue
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[self.rows(facet, spec)] = True
+            masks[facet] = mask
+        return masks
+
+    def mask(self, filters):
+        """필터 전체를 만족하는 행 마스크 (필터가 없으면 None)"""
+        masks = list(self._facet_masks(filters).values())
+        if not masks:
+            return None
+        return np.logical_and.reduce(masks) if len(masks) > 1 else masks[0]
+
+    def counts(self, matched_rows, filters=None):
+        """검색에 걸린 행들의 패싯별 값 개수 {패싯: {값: 개수}} (개수 내림차순)
+
+        각 패싯의 개수는 그 패싯 자신을 뺀 나머지 필터만 적용 - 다른 값을 골랐을 때의 결과 수
+        """
+        matched_rows = np.asarray(matched_rows, dtype=np.int64)
+        masks = self._facet_masks(filters)
+        result = {}
+        for facet in FACETS:
+            others = [m for name, m in masks.items() if name != facet]
+            rows = matched_rows
+            if others:
+                keep = np.logical_and.reduce(others) if len(others) > 1 else others[0]
+                rows = rows[keep[rows]]
+            codes = self.codes(facet)[rows]
+            values = self.facets[facet][0]
+            counts = np.bincount(codes[codes >= 0], minlength=len(values))
+            nonzero = np.flatnonzero(counts)
+            order = nonzero[np.lexsort((nonzero, -counts[nonzero]))]
+            result[facet] = {values[v].item(): int(counts[v]) for v in order}
+        return result
@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from utils.db_index import META_FILE, _atomic_save, load_matrix, save_matrix
+from utils.db_store import PARQUET_PATH, XLSX_PATH, ensure_store, file_sha256
+from utils.facet_index import build_facets, save_facets
+from utils.ranking import SCORE_THRESHOLDS, top_k_indices  # 코사인 점수라 TF-IDF와 같은 임계값 사용
+
+# 📁 해싱 인덱스 저장 경로 - 어휘 사전 없이 단어/바이그램을 고정 크기 버킷으로 해싱
+HASHING_DIR = os.path.join("data", "index", "hashing")
+
+# 인덱스 포맷 버전 - 저장 구조가 바뀌면 올려서 자동 재빌드 (2: 메타데이터/패싯 함께 저장)
+HASHING_VERSION = 2
+
+# 해싱 설정 (빌드/검색 시 동일하게 사용) - 2^20개 부호 있는 버킷, 특성 수 제한 없음
+N_FEATURES = 2 ** 20
+HASHING_PARAMS = {
+    "n_features": N_FEATURES,
+    "analyzer": "word",
+    "ngram_range": (1, 2),
+    "lowercase": True,
+    "alternate_sign": True,  # 충돌한 용어끼리 상쇄되도록 부호 부여
+    "norm": None,            # IDF를 곱한 뒤 정규화
+}
+
+# 병렬 빌드 단위 (행 수)
+CHUNK_SIZE = 5000
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+MANIFEST_FILE = "manifest.json"
+IDF_FILE = "idf.npy"
+
+
+def get_vectorizer():
+    """상태 없는 해싱 벡터라이저 (학습 불필요 - 모든 프로세스에서 같은 결과)"""
+    return HashingVectorizer(**HASHING_PARAMS)
+
+
+def _hash_chunk(texts):
+    """행 묶음 → 용어 빈도 해싱 행렬 (작업 프로세스에서 실행)"""
+    counts = get_vectorizer().transform(texts).tocsr()
+    counts.eliminate_zeros()  # 부호가 상쇄되어 0이 된 버킷은 문서 빈도에서 제외
+    return counts
+
+
+def hash_corpus(corpus, workers=DEFAULT_WORKERS, chunk_size=CHUNK_SIZE):
+    """문서 목록 → 용어 빈도 해싱 행렬 - 행 묶음별로 병렬 처리 후 순서대로 이어 붙임"""
+    chunks = [corpus[start:start + chunk_size] for start in range(0, len(corpus), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        parts = [_hash_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_hash_chunk, chunks))
+    if not parts:
+        return sparse.csr_matrix((0, N_FEATURES), dtype=np.float64)
+    return sparse.vstack(parts, format="csr")
+
+
+def compute_idf(counts):
+    """용어 빈도 행렬 → 버킷별 IDF (TfidfVectorizer의 smooth_idf와 같은 식, float32)"""
+    n_docs = counts.shape[0]
+    df = np.bincount(counts.indices, minlength=N_FEATURES)
+    return (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+
+
+def apply_idf(counts, idf):
+    """용어 빈도 행렬에 IDF를 곱하고 행 단위 L2 정규화 (내적 = 코사인)"""
+    weighted = counts.astype(np.float32, copy=True)
+    weighted.data *= idf[weighted.indices]
+    weighted = normalize(weighted, norm="l2", copy=False)
+    weighted.sort_indices()
+    return weighted
+
+
+def index_is_fresh(db_path=XLSX_PATH, index_dir=HASHING_DIR):
+    """저장된 해싱 인덱스가 현재 엑셀 파일과 일치하는지 확인"""
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if manifest.get("version") != HASHING_VERSION or manifest.get("n_features") != N_FEATURES:
+        return False
+    if not os.path.exists(db_path):
+        return True
+    return manifest.get("source_sha256") == file_sha256(db_path)
+
+
+def build_hashing_index(db_path=XLSX_PATH, index_dir=HASHING_DIR, parquet_path=PARQUET_PATH, workers=DEFAULT_WORKERS):
+    """프로젝트 제목을 해싱 TF-IDF 행렬로 만들어 디스크에 저장 (어휘 사전 없음)
+
+    메타데이터와 패싯 목록도 함께 저장 - 해싱 백엔드는 TF-IDF 인덱스 없이 단독으로 동작
+    """
+    started = time.time()
+    print(f"🏗️ 해싱 인덱스 빌드 시작: {db_path} → {index_dir} (작업 {workers}개)")
+
+    df = ensure_store(db_path, parquet_path)
+    corpus = df['Project Title'].fillna("").astype(str).tolist()
+    counts = hash_corpus(corpus, workers)
+    idf = compute_idf(counts)
+    matrix = apply_idf(counts, idf)
+
+    os.makedirs(index_dir, exist_ok=True)
+    _atomic_save(index_dir, IDF_FILE, idf)
+    save_matrix(index_dir, matrix, dtype=np.float32)
+
+    facets = build_facets(df)
+    save_facets(facets, index_dir, _atomic_save)
+    meta_path = os.path.join(index_dir, META_FILE)
+    meta_tmp = f"{meta_path}.{os.getpid()}.tmp"
+    df.to_parquet(meta_tmp, index=False)
+    os.replace(meta_tmp, meta_path)
+
+    # 매니페스트는 마지막에 기록 - 매니페스트가 있으면 나머지 파일도 완성된 상태
+    manifest = {
+        "version": HASHING_VERSION,
+        "source_sha256": file_sha256(db_path) if os.path.exists(db_path) else None,
+        "n_rows": int(matrix.shape[0]),
+        "n_features": N_FEATURES,
+        "nnz": int(matrix.nnz),
+        "facets": {facet: len(values) for facet, (values, _, _) in facets.items()},
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    manifest_tmp = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(manifest_tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_tmp, manifest_path)
+
+    print(f"✅ 해싱 인덱스 빌드 완료: {manifest['n_rows']}행, {manifest['nnz']}개 값 ({time.time() - started:.1f}초)")
+    return manifest
+
+
+class HashingIndex:
+    """메모리 매핑된 해싱 TF-IDF 행렬 + float32 IDF 배열 (코퍼스 크기와 무관한 고정 크기 상태)"""
+
+    def __init__(self, index_dir=HASHING_DIR):
+        with open(os.path.join(index_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.n_rows = self.manifest["n_rows"]
+        self.vectorizer = get_vectorizer()
+        self.idf = np.load(os.path.join(index_dir, IDF_FILE), mmap_mode='r')
+        self.matrix = load_matrix(index_dir, (self.n_rows, N_FEATURES))
+
+    def transform(self, texts):
+        """검색어 → 정규화된 해싱 TF-IDF 벡터"""
+        return apply_idf(self.vectorizer.transform(texts), self.idf)
+
+    def scores(self, query, matrix=None):
+        """검색어와 모든 행의 코사인 점수 (matrix를 주면 그 행렬 기준)"""
+        matrix = self.matrix if matrix is None else matrix
+        return np.asarray((matrix @ self.transform([query]).T).toarray()).ravel()
+
+    def search(self, query, k=10, mask=None):
+        """상위 k개 (행 번호, 점수)를 점수 내림차순으로 반환 (mask 밖의 행은 제외)"""
+        scores = self.scores(query)
+        if mask is not None:
+            scores = np.where(mask, scores, 0.0)
+        top = top_k_indices(scores, k)
+        return top, scores[top]
+
+
+def load_or_build_hashing_index(db_path=XLSX_PATH, index_dir=HASHING_DIR):
+    """해싱 인덱스가 없거나 엑셀 해시가 바뀌었으면 재빌드 후 로드"""
+    if not index_is_fresh(db_path, index_dir):
+        print("🔄 해싱 인덱스가 없거나 원본 DB가 변경됨 → 재빌드")
+        build_hashing_index(db_path, index_dir)
+    return HashingIndex(index_dir)
+
+
+if __name__ == "__main__":
+    # 오프라인 빌드: python -m utils.hashing_index [--workers 4] [--force]
+    parser = argparse.ArgumentParser(description="ISEF DB 해싱 TF-IDF 인덱스 빌드")
+    parser.add_argument("--db", default=XLSX_PATH, help="원본 엑셀 경로")
+    parser.add_argument("--out", default=HASHING_DIR, help="인덱스 저장 디렉터리")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="병렬 해싱 프로세스 수")
+    parser.add_argument("--force", action="store_true", help="해시가 같아도 다시 빌드")
+    args = parser.parse_args()
+
+    if args.force or not index_is_fresh(args.db, args.out):
+        build_hashing_index(args.db, args.out, workers=args.workers)
+    else:
+        print("✅ 해싱 인덱스가 최신 상태입니다. (--force 로 강제 재빌드)")
@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+from collections import namedtuple
+
+from utils.kv_store import CACHE_DB_PATH
+
+# 🗃️ HTTP 응답 캐시 기본값 (arXiv API 응답은 자주 바뀌지 않음)
+DEFAULT_TTL = int(os.environ.get("LSAI_ARXIV_CACHE_TTL", 6 * 60 * 60))  # 초
+DEFAULT_MAX_BYTES = int(os.environ.get("LSAI_ARXIV_CACHE_MB", 64)) * 1024 * 1024
+
+# arXiv 검색식의 불리언 연산자 - 대문자일 때만 연산자로 해석되므로 정규화에서 대소문자 유지
+QUERY_OPERATORS = frozenset({"AND", "OR", "ANDNOT"})
+
+CachedResponse = namedtuple("CachedResponse", ["body", "status", "etag", "last_modified", "fetched_at"])
+
+
+def normalize_url(url):
+    """캐시 키용 URL 정규화 - 스킴/호스트 소문자, 쿼리 파라미터 정렬, 검색어 공백/대소문자 정리 (연산자는 그대로)"""
+    parts = urllib.parse.urlsplit(url.strip())
+    params = []
+    for name, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True):
+        if name == "search_query":
+            value = " ".join(token if token in QUERY_OPERATORS else token.lower() for token in value.split())
+        params.append((name, value))
+    query = urllib.parse.urlencode(sorted(params), quote_via=urllib.parse.quote)
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+
+
+class ResponseCache:
+    """원본 응답 본문을 TTL과 함께 디스크(SQLite)에 저장하는 HTTP 응답 캐시
+
+    - 신선한 항목은 네트워크 없이 바로 사용
+    - 오래된 항목은 ETag/Last-Modified로 조건부 요청해 재검증
+    - 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제
+    """
+
+    def __init__(self, table="http_responses", path=CACHE_DB_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        if not table.replace("_", "").isalnum():
+            raise ValueError(f"잘못된 테이블 이름: {table}")
+        self.table = table
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+
+    def _connect(self):
+        """스레드별 연결 (fork 후에는 새로 연결)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, body BLOB NOT NULL, status INTEGER, etag TEXT, last_modified TEXT, "
+            "size INTEGER NOT NULL, fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def lookup(self, url):
+        """저장된 응답 조회 (없으면 None) - 신선도 판단은 is_fresh로"""
+        row = self._connect().execute(
+            f"SELECT body, status, etag, last_modified, fetched_at FROM {self.table} WHERE key = ?",
+            (normalize_url(url),),
+        ).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def is_fresh(self, cached):
+        return cached is not None and time.time() - cached.fetched_at < self.ttl
+
+    def conditional_headers(self, cached):
+        """재검증용 조건부 요청 헤더"""
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def record_hit(self, url):
+        """캐시 적중 - 마지막 사용 시각 갱신 (삭제 순서 결정용)"""
+        self._count("hits")
+        self._connect().execute(
+            f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (time.time(), normalize_url(url))
+        )
+
+    def record_miss(self):
+        self._count("misses")
+
+    def refresh(self, url):
+        """304 응답 - 본문은 그대로 두고 TTL만 연장"""
+        self._count("revalidated")
+        now = time.time()
+        self._connect().execute(
+            f"UPDATE {self.table} SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, normalize_url(url))
+        )
+
+    def store(self, url, body, status=None, etag=None, last_modified=None):
+        """응답 저장 후 크기 제한 초과분 삭제"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                "(key, body, status, etag, last_modified, size, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), sqlite3.Binary(body), status, etag, last_modified, len(body), now, now),
+            )
+            # 최근 사용 순으로 누적 크기를 세어 한도를 넘는 항목 삭제
+            evicted = conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS running "
+                f"FROM {self.table}) WHERE running > ?)",
+                (self.max_bytes,),
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._count("stores")
+        if evicted > 0:
+            self._count("evictions", evicted)
+
+    def clear(self):
+        self._connect().execute(f"DELETE FROM {self.table}")
+
+    def stats(self):
+        """적중/실패 카운터(이 프로세스) + 저장된 항목 수/전체 크기"""
+        entries, total = self._connect().execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"] + stats["revalidated"]
+        stats.update({
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hit_rate": (stats["hits"] + stats["revalidated"]) / lookups if lookups else 0.0,
+        })
+        return stats
@@ -0,0 +1,448 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import cosine_similarity
+
+from utils.bm25_index import BM25_DIR, BM25Index, build_bm25_index, build_postings, save_postings
+from utils.db_index import (
+    INDEX_DIR,
+    META_FILE,
+    _atomic_save,
+    build_index,
+    load_matrix,
+    load_vectorizer,
+    read_manifest,
+    save_matrix,
+)
+from utils.db_store import (
+    PARQUET_PATH,
+    XLSX_PATH,
+    ensure_store,
+    file_sha256,
+    read_merged_segments,
+    read_source_hash,
+    to_typed_frame,
+    write_store,
+)
+from utils.dense_index import DENSE_DIR, ENCODERS, build_dense_index, encoder_dir, get_encoder
+from utils.dense_index import read_manifest as read_dense_manifest
+from utils.facet_index import build_facets, load_facets, save_facets
+from utils.hashing_index import HASHING_DIR, N_FEATURES, apply_idf, build_hashing_index, hash_corpus
+from utils.hashing_index import MANIFEST_FILE as HASHING_MANIFEST, IDF_FILE as HASHING_IDF_FILE
+
+# 📁 추가 세그먼트 저장 경로 - 새 대회 연도를 기본 인덱스 재빌드 없이 덧붙임
+SEGMENTS_DIR = os.path.join(INDEX_DIR, "segments")
+
+# 세그먼트 포맷 버전 - 저장 구조가 바뀌면 올려서 이전 세그먼트는 무시 (2: 백엔드별 기준 인덱스)
+SEGMENT_VERSION = 2
+
+# 세그먼트가 이 개수를 넘으면 추가 후 백그라운드 병합 시작
+MAX_SEGMENTS = int(os.environ.get("LSAI_MAX_SEGMENTS", 8))
+
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "dense_{}.npy"
+COMPACT_MARKER = "COMPACTING"
+
+# 병합 표시 파일이 이 시간(초)보다 오래되면 중단된 병합으로 보고 무시
+COMPACT_STALE_SECONDS = int(os.environ.get("LSAI_COMPACT_STALE_SECONDS", 3600))
+
+_COMPACT_LOCK = threading.Lock()  # 같은 프로세스 안의 중복 실행 방지 (프로세스 간은 표시 파일)
+
+
+def list_segments(segments_dir=SEGMENTS_DIR):
+    """완성된(매니페스트가 있는) 세그먼트 디렉터리 이름 - 추가된 순서"""
+    if not os.path.isdir(segments_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(segments_dir)
+        if name.startswith("seg-") and os.path.exists(os.path.join(segments_dir, name, MANIFEST_FILE))
+    )
+
+
+def _base_id(index_dir=INDEX_DIR):
+    """기본 인덱스 식별자 - 재빌드되면 바뀌어 이전 기준의 세그먼트를 무효로 판단"""
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"기본 인덱스가 없습니다: {index_dir} (python -m utils.db_index 먼저 실행)")
+    return f"{manifest['built_at']}/{manifest['n_rows']}"
+
+
+def segment_base(index_dir=INDEX_DIR, hashing_dir=HASHING_DIR):
+    """세그먼트 행 번호의 기준 인덱스 (디렉터리, 백엔드) - TF-IDF 인덱스가 없으면 해싱 인덱스"""
+    if read_manifest(index_dir) is None and read_manifest(hashing_dir) is not None:
+        return hashing_dir, "hashing"
+    return index_dir, "tfidf"
+
+
+def _read_rows(rows_path):
+    """추가할 행 파일 (엑셀 또는 Parquet) → 기본 DB와 같은 타입의 DataFrame"""
+    if rows_path.endswith(".parquet"):
+        return to_typed_frame(pd.read_parquet(rows_path))
+    return to_typed_frame(pd.read_excel(rows_path))
+
+
+def append_segment(rows_path, index_dir=INDEX_DIR, segments_dir=SEGMENTS_DIR, dense_dir=DENSE_DIR, hashing_dir=HASHING_DIR):
+    """새 행들을 추가 세그먼트로 색인 - 비용은 새 행 수에만 비례 (기본 인덱스는 그대로)
+
+    TF-IDF 벡터는 기본 인덱스의 어휘/IDF로 변환해 점수를 그대로 비교할 수 있고,
+    BM25 포스팅과 패싯 목록은 세그먼트 안에서 따로 만듦 (행 번호는 세그먼트 내부 기준)
+    기본 임베딩/해싱 인덱스가 있으면 같은 인코더/기본 IDF로 세그먼트 벡터도 저장
+    TF-IDF 인덱스 없이 해싱 인덱스만 있는 배포에서는 TF-IDF 행렬을 만들지 않음
+    """
+    if os.path.exists(os.path.join(segments_dir, COMPACT_MARKER)):
+        raise RuntimeError("세그먼트 병합 중에는 추가할 수 없습니다. 병합이 끝난 뒤 다시 시도하세요.")
+
+    started = time.time()
+    df = _read_rows(rows_path)
+    if df.empty:
+        raise ValueError(f"추가할 행이 없습니다: {rows_path}")
+    existing = list_segments(segments_dir)
+    name = f"seg-{int(existing[-1][4:]) + 1 if existing else 1:04d}"
+    segment_dir = os.path.join(segments_dir, name)
+    print(f"🏗️ 세그먼트 추가 시작: {rows_path} → {segment_dir} ({len(df)}행)")
+
+    has_tfidf = read_manifest(index_dir) is not None
+    has_hashing = os.path.exists(os.path.join(hashing_dir, HASHING_MANIFEST))
+    if not has_tfidf and not has_hashing:
+        raise FileNotFoundError(f"기본 인덱스가 없습니다: {index_dir}, {hashing_dir} (python -m utils.db_index 먼저 실행)")
+
+    os.makedirs(segment_dir, exist_ok=True)
+    corpus = df['Project Title'].fillna("").astype(str).tolist()
+
+    # 1. TF-IDF - 학습하지 않고 기본 어휘로 변환만
+    n_features = 0
+    if has_tfidf:
+        matrix = load_vectorizer(index_dir).transform(corpus).tocsr()
+        matrix.sort_indices()
+        save_matrix(segment_dir, matrix)
+        n_features = int(matrix.shape[1])
+
+    # 2. BM25 포스팅 (세그먼트 내부 통계 - 병합하면 전체 통계로 다시 계산됨)
+    source_sha256 = file_sha256(rows_path)
+    terms, offsets, docs, impacts, max_impact = build_postings(corpus)
+    save_postings(os.path.join(segment_dir, "bm25"), terms, offsets, docs, impacts, max_impact, {
+        "source_sha256": source_sha256,
+        "n_docs": len(corpus),
+    })
+
+    # 3. 임베딩 - 기본 인덱스가 만들어진 인코더만
+    encoders = []
+    for encoder_name in ENCODERS:
+        encoder = get_encoder(encoder_name)
+        if read_dense_manifest(encoder_dir(encoder, dense_dir)) is not None:
+            vectors = np.ascontiguousarray(encoder.encode(corpus), dtype=np.float32)
+            _atomic_save(segment_dir, VECTORS_FILE.format(encoder.name), vectors)
+            encoders.append(encoder.name)
+
+    # 4. 해싱 TF-IDF - 해싱은 상태가 없어 기본 인덱스의 IDF만 있으면 됨
+    if has_hashing:
+        idf = np.load(os.path.join(hashing_dir, HASHING_IDF_FILE))
+        hashing_segment_dir = os.path.join(segment_dir, "hashing")
+        os.makedirs(hashing_segment_dir, exist_ok=True)
+        save_matrix(hashing_segment_dir, apply_idf(hash_corpus(corpus, workers=1), idf), dtype=np.float32)
+
+    # 5. 패싯 목록과 행 메타데이터
+    save_facets(build_facets(df), segment_dir, _atomic_save)
+    meta_path = os.path.join(segment_dir, META_FILE)
+    meta_tmp = f"{meta_path}.{os.getpid()}.tmp"
+    df.to_parquet(meta_tmp, index=False)
+    os.replace(meta_tmp, meta_path)
+
+    # 매니페스트는 마지막에 기록 - 매니페스트가 있는 세그먼트만 검색에 사용
+    manifest = {
+        "version": SEGMENT_VERSION,
+        "id": uuid.uuid4().hex,  # 세그먼트 번호는 병합 후 다시 쓰이므로 병합 기록에는 고유 ID 사용
+        "bases": {
+            "tfidf": _base_id(index_dir) if has_tfidf else None,
+            "hashing": _base_id(hashing_dir) if has_hashing else None,
+        },
+        "source_path": rows_path,
+        "source_sha256": source_sha256,
+        "n_rows": len(df),
+        "n_features": n_features,
+        "encoders": encoders,
+        "hashing": has_hashing,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    manifest_path = os.path.join(segment_dir, MANIFEST_FILE)
+    manifest_tmp = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(manifest_tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_tmp, manifest_path)
+
+    print(f"✅ 세그먼트 추가 완료: {name}, {manifest['n_rows']}행 ({time.time() - started:.1f}초)")
+    return manifest
+
+
+class Segment:
+    """메모리 매핑된 추가 세그먼트 - 행 번호는 row_offset부터 이어짐"""
+
+    def __init__(self, segment_dir, row_offset):
+        with open(os.path.join(segment_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.path = segment_dir
+        self.name = os.path.basename(segment_dir)
+        self.id = self.manifest.get("id") or f"{self.name}@{self.manifest['created_at']}"
+        self.n_rows = self.manifest["n_rows"]
+        self.row_offset = row_offset
+        self.matrix = None  # TF-IDF 인덱스 없이 추가된 세그먼트는 None
+        if self.manifest["n_features"]:
+            self.matrix = load_matrix(segment_dir, (self.n_rows, self.manifest["n_features"]))
+        self.facets = load_facets(segment_dir)
+        self.meta = pd.read_parquet(os.path.join(segment_dir, META_FILE))
+        self._bm25 = None
+        self._hashing_matrix = None
+
+    @property
+    def bm25(self):
+        """세그먼트 BM25 역색인 (처음 사용할 때 로드)"""
+        if self._bm25 is None:
+            self._bm25 = BM25Index(os.path.join(self.path, "bm25"))
+        return self._bm25
+
+    @property
+    def hashing_matrix(self):
+        """세그먼트 해싱 TF-IDF 행렬 (없으면 None)"""
+        if self._hashing_matrix is None and self.manifest.get("hashing"):
+            self._hashing_matrix = load_matrix(os.path.join(self.path, "hashing"), (self.n_rows, N_FEATURES))
+        return self._hashing_matrix
+
+    def vectors(self, encoder_name):
+        """세그먼트 임베딩 (없으면 None)"""
+        if encoder_name not in self.manifest.get("encoders", []):
+            return None
+        return np.load(os.path.join(self.path, VECTORS_FILE.format(encoder_name)), mmap_mode='r')
+
+
+def load_segments(index_dir=INDEX_DIR, segments_dir=SEGMENTS_DIR, backend="tfidf"):
+    """현재 기본 인덱스 기준으로 만들어진 세그먼트들을 추가 순서대로 로드
+
+    backend: 행 번호 기준이 되는 인덱스 ("tfidf" 또는 "hashing", index_dir가 그 인덱스 디렉터리)
+    """
+    base = read_manifest(index_dir)
+    if base is None:
+        return []
+    base_id = _base_id(index_dir)
+    segments = []
+    row_offset = base["n_rows"]
+    for name in list_segments(segments_dir):
+        segment_dir = os.path.join(segments_dir, name)
+        try:
+            segment = Segment(segment_dir, row_offset)
+        except Exception as e:
+            print(f"⚠️ 세그먼트 로드 실패 ({name}): {e}")
+            continue
+        if segment.manifest.get("version") != SEGMENT_VERSION or segment.manifest["bases"].get(backend) != base_id:
+            # 기본 인덱스가 재빌드되어 어휘가 달라진 세그먼트는 점수를 비교할 수 없음
+            print(f"⚠️ 기본 인덱스와 맞지 않는 세그먼트 무시: {name}")
+            continue
+        segments.append(segment)
+        row_offset += segment.n_rows
+    if segments:
+        print(f"🧩 추가 세그먼트 {len(segments)}개 로드: {row_offset - base['n_rows']}행")
+    return segments
+
+
+def merge_top_k(parts, k):
+    """세그먼트별 (전체 행 번호, 점수) 후보 → 전체 상위 k개 (점수 내림차순, 동점은 행 번호 순)"""
+    ids = np.concatenate([p[0] for p in parts]).astype(np.int64)
+    scores = np.concatenate([p[1] for p in parts])
+    order = np.lexsort((ids, -scores))[:k]
+    return ids[order], scores[order]
+
+
+def _mask_slice(mask, start, n_rows):
+    return None if mask is None else mask[start:start + n_rows]
+
+
+def tfidf_scores(query_vector, base_matrix, segments):
+    """기본 + 세그먼트 코사인 점수를 이어 붙인 전체 점수 배열 (같은 어휘라 그대로 비교 가능)"""
+    scores = [cosine_similarity(query_vector, base_matrix)[0]]
+    for segment in segments:
+        scores.append(cosine_similarity(query_vector, segment.matrix)[0])
+    return np.concatenate(scores)
+
+
+def hashing_scores(hashing_index, segments, query):
+    """해싱 모드 전체 점수 배열 - 해싱 벡터가 없는 세그먼트는 0점"""
+    scores = [hashing_index.scores(query)]
+    for segment in segments:
+        matrix = segment.hashing_matrix
+        scores.append(np.zeros(segment.n_rows) if matrix is None else hashing_index.scores(query, matrix))
+    return np.concatenate(scores)
+
+
+def bm25_search(base_index, segments, query, k, mask=None):
+    """세그먼트별 BM25 상위 k개를 합쳐 전체 상위 k개"""
+    parts = [base_index.search(query, k, mask=_mask_slice(mask, 0, base_index.n_docs))]
+    for segment in segments:
+        ids, scores = segment.bm25.search(query, k, mask=_mask_slice(mask, segment.row_offset, segment.n_rows))
+        parts.append((ids + segment.row_offset, scores))
+    return merge_top_k(parts, k)
+
+
+def bm25_matching_docs(base_index, segments, query):
+    """질의 용어가 들어 있는 전체 행 번호"""
+    docs = [base_index.matching_docs(query)]
+    for segment in segments:
+        docs.append(segment.bm25.matching_docs(query) + segment.row_offset)
+    return np.concatenate(docs)
+
+
+def dense_search(base_index, segments, query, k, mask=None):
+    """기본 faiss k-NN + 세그먼트 벡터 전수 내적 (세그먼트는 작아서 ANN 불필요)"""
+    vector = base_index.encoder.encode([query])
+    n_base = base_index.manifest["n_rows"]
+    parts = [base_index.search_vector(vector, k, _mask_slice(mask, 0, n_base))]
+    for segment in segments:
+        vectors = segment.vectors(base_index.encoder.name)
+        if vectors is None:
+            continue
+        scores = np.asarray(vectors @ vector[0], dtype=np.float32)
+        segment_mask = _mask_slice(mask, segment.row_offset, segment.n_rows)
+        ids = np.arange(segment.n_rows) if segment_mask is None else np.flatnonzero(segment_mask)
+        top = ids[np.argsort(-scores[ids], kind="stable")[:k]]
+        parts.append((top + segment.row_offset, scores[top]))
+    return merge_top_k(parts, k)
+
+
+def _acquire_compact_marker(marker):
+    """병합 표시 파일을 배타적으로 생성 (O_EXCL) - 다른 프로세스가 병합 중이면 False
+
+    중단된 병합이 남긴 오래된 표시 파일은 지우고 한 번 더 시도
+    """
+    os.makedirs(os.path.dirname(marker), exist_ok=True)
+    for _ in range(2):
+        try:
+            fd = os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                age = time.time() - os.path.getmtime(marker)
+            except OSError:
+                continue  # 그 사이에 병합이 끝나 표시 파일이 사라짐
+            if age <= COMPACT_STALE_SECONDS:
+                return False
+            print(f"⚠️ 오래된 병합 표시 파일 제거 ({age:.0f}초 전): {marker}")
+            try:
+                os.remove(marker)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(f"{os.getpid()} {time.strftime('%Y-%m-%dT%H:%M:%S')}")
+        return True
+    return False
+
+
+def compact_segments(db_path=XLSX_PATH, index_dir=INDEX_DIR, segments_dir=SEGMENTS_DIR,
+                     parquet_path=PARQUET_PATH, bm25_dir=BM25_DIR, dense_dir=DENSE_DIR, hashing_dir=HASHING_DIR):
+    """세그먼트를 저장소에 합치고 기본 인덱스를 한 번에 재빌드 (어휘/IDF/BM25 통계 갱신)
+
+    세그먼트 행은 Parquet 저장소 뒤에 붙여 기록 (원본 엑셀 해시는 유지) → 기본 인덱스 재빌드
+    → 기존에 만들어 둔 BM25/임베딩/해싱 인덱스도 재빌드 → 합친 세그먼트 삭제
+    여러 프로세스가 동시에 호출해도 표시 파일(O_EXCL)로 한 곳에서만 실행되고,
+    저장소에 병합된 세그먼트 ID를 함께 기록해 이미 합친 세그먼트는 다시 붙이지 않음
+    """
+    if not _COMPACT_LOCK.acquire(blocking=False):
+        print("⏳ 이미 세그먼트 병합 중")
+        return None
+    marker = os.path.join(segments_dir, COMPACT_MARKER)
+    owns_marker = False
+    try:
+        # 저장소를 읽기 전에 프로세스 간 잠금부터 확보
+        owns_marker = _acquire_compact_marker(marker)
+        if not owns_marker:
+            print("⏳ 다른 프로세스에서 세그먼트 병합 중")
+            return None
+
+        base_dir, backend = segment_base(index_dir, hashing_dir)
+        segments = load_segments(base_dir, segments_dir, backend)
+        if not segments:
+            print("✅ 병합할 세그먼트가 없습니다.")
+            return None
+        started = time.time()
+        print(f"🗜️ 세그먼트 병합 시작: {len(segments)}개")
+
+        # 1. 저장소에 아직 합쳐지지 않은 세그먼트 행만 덧붙이기 (ID 기록과 한 번에 교체)
+        store = ensure_store(db_path, parquet_path)
+        merged = set(read_merged_segments(parquet_path))
+        pending = [s for s in segments if s.id not in merged]
+        if len(pending) < len(segments):
+            print(f"♻️ 이미 저장소에 합쳐진 세그먼트 {len(segments) - len(pending)}개는 건너뜀")
+        combined = store
+        if pending:
+            combined = pd.concat([store] + [s.meta for s in pending], ignore_index=True)
+            write_store(to_typed_frame(combined), parquet_path, read_source_hash(parquet_path),
+                        merged | {s.id for s in pending})
+
+        # 2. 이미 있는 백엔드 인덱스만 재빌드 (해싱 단독 배포면 TF-IDF 인덱스는 만들지 않음)
+        if read_manifest(index_dir) is not None:
+            build_index(db_path, index_dir, parquet_path)
+        if os.path.exists(os.path.join(bm25_dir, MANIFEST_FILE)):
+            build_bm25_index(db_path, bm25_dir, parquet_path)
+        if os.path.exists(os.path.join(hashing_dir, HASHING_MANIFEST)):
+            build_hashing_index(db_path, hashing_dir, parquet_path)
+        for encoder_name in ENCODERS:
+            encoder = get_encoder(encoder_name)
+            manifest = read_dense_manifest(encoder_dir(encoder, dense_dir))
+            if manifest is not None:
+                build_dense_index(encoder, db_path, dense_dir, manifest["index_type"], parquet_path=parquet_path)
+
+        # 3. 합친 세그먼트 삭제 (검색 중인 프로세스의 매핑은 그대로 유효, 병합 중 추가된 세그먼트는 유지)
+        for segment in segments:
+            shutil.rmtree(segment.path, ignore_errors=True)
+
+        print(f"✅ 세그먼트 병합 완료: {len(combined)}행 ({time.time() - started:.1f}초)")
+        return len(combined)
+    finally:
+        if owns_marker and os.path.exists(marker):
+            os.remove(marker)
+        _COMPACT_LOCK.release()
+
+
+def start_background_compaction(on_done=None, **kwargs):
+    """세그먼트 병합을 백그라운드 스레드에서 실행 - 끝나면 on_done() 호출 (이미 병합 중이면 None)"""
+    if _COMPACT_LOCK.locked():
+        return None
+
+    def _run():
+        try:
+            if compact_segments(**kwargs) and on_done is not None:
+                on_done()
+        except Exception as e:
+            print(f"❌ 세그먼트 병합 실패: {e}")
+
+    thread = threading.Thread(target=_run, name="lsai-compaction", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    # 새 연도 추가: python -m utils.index_segments append "ISEF 2025.xlsx"
+    # 세그먼트 병합: python -m utils.index_segments compact
+    parser = argparse.ArgumentParser(description="ISEF DB 추가 세그먼트 관리")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    append_parser = subparsers.add_parser("append", help="새 행 파일(엑셀/Parquet)을 세그먼트로 추가")
+    append_parser.add_argument("rows", help="추가할 행 파일 경로")
+    subparsers.add_parser("compact", help="세그먼트를 기본 인덱스로 병합")
+    subparsers.add_parser("list", help="세그먼트 목록")
+    args = parser.parse_args()
+
+    if args.command == "append":
+        append_segment(args.rows)
+        if len(list_segments()) > MAX_SEGMENTS:
+            print(f"🗜️ 세그먼트가 {MAX_SEGMENTS}개를 넘어 병합합니다.")
+            compact_segments()
+    elif args.command == "compact":
+        compact_segments()
+    else:
+        base_dir, backend = segment_base()
+        for segment in load_segments(base_dir, backend=backend):
+            print(f"{segment.name}: {segment.n_rows}행 (행 번호 {segment.row_offset}~, {segment.manifest['source_path']})")
@@ -0,0 +1,184 @@
+import json
+import os
+from collections import namedtuple
+
+# 📖 한국어 → 영어 과학 용어집 (버전이 있는 데이터 파일, 모듈 로드 시 한 번만 읽음)
+GLOSSARY_PATH = os.environ.get("LSAI_GLOSSARY", os.path.join("data", "glossary_ko_en.json"))
+GLOSSARY_VERSION = 1
+
+# 용어 뒤에 붙는 조사 (긴 것부터 확인할 필요 없음 - 연쇄 판정은 모든 분할을 시도)
+JOSA = (
+    "은", "는", "이", "가", "을", "를", "의", "에", "에서", "에게", "께", "와", "과", "도", "만",
+    "로", "으로", "부터", "까지", "처럼", "보다", "이나", "나", "랑", "이랑", "이란", "란",
+    "이며", "이고", "이다", "인", "들", "마다", "조차", "밖에", "인가", "인지", "일까",
+)
+
+# 용어 뒤에 붙는 어미/파생 접미사 (하다·되다·시키다 활용형, '-적')
+EOMI = (
+    "하다", "하는", "한", "할", "함", "하기", "하여", "해서", "하고", "하며", "하면", "했다", "했을",
+    "되다", "되는", "된", "될", "됨", "되어", "되기", "시키는", "시킨", "시킴", "시키기",
+    "적", "적인", "적으로",
+)
+
+# 검색에 의미 없는 연결어 - 번역 요청 대상에서 제외
+STOPWORDS = {
+    "대한", "관한", "위한", "따른", "통한", "대하여", "관하여", "위하여", "따라", "통해",
+    "대해", "위해", "이용한", "활용한", "사용한", "이용하여", "활용하여", "사용하여",
+    "미치는", "주는", "있는", "없는", "알아보기", "알아보는", "만들기",
+    "그리고", "또는", "어떤", "무엇", "어떻게", "왜",
+}
+
+_SUFFIXES = frozenset(JOSA + EOMI)
+_JOSA = frozenset(JOSA)
+# 모르는 단어에서 뗄 때는 단어 끝 글자와 헷갈리기 쉬운 한 글자(이, 가, 도 ...)는 제외 (원숭이 → 원숭 방지)
+_SAFE_SUFFIXES = frozenset(s for s in _SUFFIXES if len(s) > 1) | {"은", "는", "을", "를", "의", "에", "와", "과", "로"}
+_MAX_SUFFIX_LEN = max(len(s) for s in _SUFFIXES)
+
+
+def load_glossary(path=GLOSSARY_PATH):
+    """용어집 파일 → {한국어 용어: 영어 키워드(공백 구분)} - 버전이 다르면 ValueError"""
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    if doc.get("version") != GLOSSARY_VERSION:
+        raise ValueError(f"용어집 버전 불일치: {doc.get('version')} (필요: {GLOSSARY_VERSION})")
+    return doc["entries"]
+
+
+def _is_hangul(ch):
+    return '가' <= ch <= '힣'
+
+
+def _is_latin(ch):
+    return ('a' <= ch <= 'z') or ('A' <= ch <= 'Z')
+
+
+def is_suffix_chain(text, allowed=_SUFFIXES):
+    """text 전체가 조사/어미를 이어 붙인 것인지 (빈 문자열도 True)"""
+    if not text:
+        return True
+    for n in range(1, min(len(text), _MAX_SUFFIX_LEN) + 1):
+        if text[:n] in allowed and is_suffix_chain(text[n:], allowed):
+            return True
+    return False
+
+
+def strip_suffixes(word, allowed=_SAFE_SUFFIXES):
+    """어절 끝의 조사/어미를 떼어낸 어간 (두 글자 이상은 남김)"""
+    for end in range(2, len(word)):
+        if is_suffix_chain(word[end:], allowed):
+            return word[:end]
+    return word
+
+
+# 한 어절의 분석 결과: 용어집 용어 목록, 용어집으로 풀지 못한 어간 (없으면 None)
+WordMatch = namedtuple("WordMatch", ["word", "terms", "unknown"])
+ScanResult = namedtuple("ScanResult", ["words", "latin_words"])
+
+
+class KoreanGlossary:
+    """용어집 트라이 - 어절을 가장 긴 용어 단위로 나누고 남은 부분이 조사/어미면 용어집만으로 해결"""
+
+    def __init__(self, entries):
+        self.entries = dict(entries)
+        # 한 글자 용어(빛, 열 등)는 '용어+조사' 형태의 어절에만 사용 - 복합어 분할에 쓰면 오탐이 많음
+        self._single = {term for term in self.entries if len(term) == 1}
+        self._root = {}
+        for term in self.entries:
+            if len(term) < 2:
+                continue
+            node = self._root
+            for ch in term:
+                node = node.setdefault(ch, {})
+            node[None] = True
+
+    def __len__(self):
+        return len(self.entries)
+
+    def prefix_ends(self, word, start):
+        """word[start:]의 앞부분과 일치하는 용어들의 끝 위치 (짧은 것부터)"""
+        ends = []
+        node = self._root
+        for i in range(start, len(word)):
+            node = node.get(word[i])
+            if node is None:
+                break
+            if None in node:
+                ends.append(i + 1)
+        return ends
+
+    def _segment(self, word):
+        """word 앞부분을 용어로 빈틈없이 나눌 수 있는 위치별 최소 분할 {끝 위치: 용어 목록}"""
+        best = {0: []}
+        for start in range(len(word)):
+            if start not in best:
+                continue
+            for end in self.prefix_ends(word, start):
+                candidate = best[start] + [word[start:end]]
+                if end not in best or len(candidate) < len(best[end]):
+                    best[end] = candidate
+        return best
+
+    def _longest_matches(self, word):
+        """빈틈없이 나눌 수 없을 때 - 왼쪽부터 가장 긴 용어만 골라냄"""
+        terms = []
+        pos = 0
+        while pos < len(word):
+            ends = self.prefix_ends(word, pos)
+            if ends:
+                terms.append(word[pos:ends[-1]])
+                pos = ends[-1]
+            else:
+                pos += 1
+        return terms
+
+    def analyze_word(self, word):
+        """한글 어절 → WordMatch (용어 목록, 풀지 못한 어간)"""
+        if word in self.entries:
+            return WordMatch(word, [word], None)
+        if word in STOPWORDS:
+            return WordMatch(word, [], None)
+
+        # 1. 용어들 + 조사/어미 (예: 배터리의, 태양광발전은, 운동하기)
+        best = self._segment(word)
+        for end in sorted(best, reverse=True):
+            if end > 0 and is_suffix_chain(word[end:]):
+                return WordMatch(word, best[end], None)
+
+        # 2. 한 글자 용어 + 조사 (예: 빛의)
+        if word[0] in self._single and is_suffix_chain(word[1:], _JOSA):
+            return WordMatch(word, [word[0]], None)
+
+        # 3. 모르는 어간 - 포함된 용어는 쓰고 어간은 번역 대상으로 넘김
+        stem = strip_suffixes(word)
+        if stem in STOPWORDS:
+            return WordMatch(word, [], None)
+        return WordMatch(word, self._longest_matches(stem), stem if len(stem) >= 2 else None)
+
+    def english(self, term):
+        """용어 → 영어 키워드 목록"""
+        return self.entries[term].split()
+
+    def scan(self, text):
+        """입력을 한 번 훑어서 한글 어절별 분석 결과와 영어 단어 목록 반환"""
+        words = []
+        latin_words = []
+        hangul_start = latin_start = -1
+        for i, ch in enumerate(text + " "):
+            if _is_hangul(ch):
+                if hangul_start < 0:
+                    hangul_start = i
+            elif hangul_start >= 0:
+                words.append(self.analyze_word(text[hangul_start:i]))
+                hangul_start = -1
+            if _is_latin(ch):
+                if latin_start < 0:
+                    latin_start = i
+            elif latin_start >= 0:
+                latin_words.append(text[latin_start:i])
+                latin_start = -1
+        return ScanResult(words, latin_words)
+
+
+# 모듈 로드 시 한 번만 읽고 트라이 구성
+KEYWORD_MAP = load_glossary()
+GLOSSARY = KoreanGlossary(KEYWORD_MAP)
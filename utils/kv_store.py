@@ -0,0 +1,87 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# 📁 프로세스 간 공유 캐시 DB 경로
+CACHE_DB_PATH = os.environ.get("LSAI_CACHE_DB", os.path.join("data", "cache", "lsai_cache.sqlite3"))
+
+# SQLite 한 문장에 넣을 수 있는 변수 수 제한을 고려한 배치 크기
+_CHUNK_SIZE = 500
+
+
+class SQLiteStore:
+    """여러 프로세스/스레드가 함께 쓰는 SQLite 키-값 저장소 (WAL 모드, 값은 JSON)"""
+
+    def __init__(self, table, path=CACHE_DB_PATH):
+        if not table.replace("_", "").isalnum():
+            raise ValueError(f"잘못된 테이블 이름: {table}")
+        self.table = table
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        """스레드별 연결 (fork 후에는 새로 연결)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key, default=None):
+        """키 하나 조회"""
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys):
+        """여러 키를 한 번에 조회 - 있는 키만 {키: 값}으로 반환"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        conn = self._connect()
+        for start in range(0, len(keys), _CHUNK_SIZE):
+            chunk = keys[start:start + _CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            for key, value in rows:
+                found[key] = json.loads(value)
+        return found
+
+    def put(self, key, value):
+        """키 하나 저장 (있으면 덮어씀)"""
+        self.put_many({key: value})
+
+    def put_many(self, items):
+        """여러 키를 한 트랜잭션으로 저장"""
+        items = dict(items)
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, json.dumps(value, ensure_ascii=False), now) for key, value in items.items()]
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, updated_at) VALUES (?, ?, ?)", rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def keys(self):
+        """저장된 모든 키"""
+        return [row[0] for row in self._connect().execute(f"SELECT key FROM {self.table}")]
+
+    def __len__(self):
+        return self._connect().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+# ⚡ 요약 등 모델 호출용 공용 작업 풀 - 프로세스 전체 동시 호출 수 상한
+MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 20  # 항목별 제한 시간 (초)
+
+_POOL = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="lsai-worker")
+
+
+QUEUE_POLL_INTERVAL = 0.1  # 풀 대기열에 있는 항목의 시작 여부 확인 간격 (초)
+
+
+def map_in_order(func, items, fallback, timeout=DEFAULT_TIMEOUT):
+    """items를 공용 풀에서 동시에 처리하고 입력 순서대로 결과 반환
+
+    각 항목은 실행을 시작한 시점부터 timeout초 안에 끝나야 하며 (풀 대기 시간은 제외),
+    시간 초과나 예외가 나면 fallback(item, error) 값으로 대체
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    started = [None] * len(items)  # 항목별 실행 시작 시각 (대기열에 있으면 None)
+
+    def _run(i, item):
+        started[i] = time.monotonic()
+        return func(item)
+
+    futures = [_POOL.submit(_run, i, item) for i, item in enumerate(items)]
+    results = []
+    for i, (item, future) in enumerate(zip(items, futures)):
+        while True:
+            # 다른 세션의 작업이 풀을 차지하고 있으면 시작할 때까지 제한 시간을 세지 않음
+            start = started[i]
+            wait = QUEUE_POLL_INTERVAL if start is None else max(0.0, start + timeout - time.monotonic())
+            try:
+                results.append(future.result(timeout=wait))
+            except FutureTimeoutError as e:
+                if start is None:
+                    continue
+                # 실행 중인 작업은 취소할 수 없음 - 결과를 버림
+                print(f"⏱️ 작업 시간 초과 ({timeout}초)")
+                results.append(fallback(item, e))
+            except Exception as e:
+                print(f"⚠️ 작업 실패: {e}")
+                results.append(fallback(item, e))
+            break
+    return results
@@ -0,0 +1,140 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import anthropic
+import pandas as pd
+
+from utils.db_store import PARQUET_PATH, XLSX_PATH, ensure_store
+from utils.kv_store import SQLiteStore
+
+# 🤖 ISEF 프로젝트 요약 저장소 - 요약은 (제목, 분야)에만 의존하므로 미리 생성해 둠
+SUMMARY_MODEL = "claude-3-5-sonnet-20241022"
+_STORE = SQLiteStore("isef_summaries")
+
+# 오프라인 작업 기본값
+DEFAULT_WORKERS = 4
+CHECKPOINT_SIZE = 50  # 이 개수마다 저장 (중단 후 재시작 단위)
+
+
+def _clean(value):
+    """결측값/범주형 값을 문자열로 정리"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    return str(value).strip()
+
+
+def summary_key(title, category=None):
+    """요약 저장 키 - (제목, 분야)"""
+    return f"{_clean(title)}\x1f{_clean(category)}"
+
+
+def _api_key():
+    """Claude API 키 - 오프라인 작업은 환경 변수, 앱에서는 st.secrets"""
+    key = os.environ.get("ANTHROPIC_API_KEY")
+    if key:
+        return key
+    import streamlit as st
+    return st.secrets["api"]["claude_key"]
+
+
+def request_summary(title, category=None, client=None):
+    """Claude로 프로젝트 요약 생성 (실패 시 예외 발생)"""
+    client = client or anthropic.Anthropic(api_key=_api_key())
+
+    prompt = f"제목: '{title}'"
+    if category:
+        prompt += f" (분야: {category})"
+    prompt += "\n\n위 과학 프로젝트 제목을 보고 3-4문장으로 내용을 추론해서 설명해주세요. '~로 추정됩니다' 표현을 사용하세요."
+
+    response = client.messages.create(
+        model=SUMMARY_MODEL,
+        max_tokens=200,
+        temperature=0.3,
+        messages=[
+            {"role": "user", "content": prompt}
+        ]
+    )
+    return response.content[0].text.strip()
+
+
+def lookup_summaries(rows):
+    """행 목록의 저장된 요약 조회 - 행 순서대로 요약 또는 None"""
+    keys = [summary_key(row.get('Project Title'), row.get('Category')) for row in rows]
+    try:
+        found = _STORE.get_many(keys)
+    except Exception as e:
+        print(f"⚠️ 요약 저장소 조회 실패: {e}")
+        found = {}
+    return [found.get(key) for key in keys]
+
+
+def store_summary(title, category, summary):
+    """요약 하나 저장"""
+    try:
+        _STORE.put(summary_key(title, category), summary)
+    except Exception as e:
+        print(f"⚠️ 요약 저장 실패: {e}")
+
+
+def pending_pairs(df):
+    """아직 요약이 없는 (제목, 분야) 목록 - 중복 제거"""
+    pairs = {}
+    for title, category in zip(df['Project Title'], df['Category']):
+        title, category = _clean(title), _clean(category)
+        if title:
+            pairs.setdefault(summary_key(title, category), (title, category))
+    done = set(_STORE.keys())
+    return [pair for key, pair in pairs.items() if key not in done]
+
+
+def precompute_summaries(df, workers=DEFAULT_WORKERS, limit=None, checkpoint_size=CHECKPOINT_SIZE):
+    """DB 전체 요약을 동시 요청 수를 제한해 생성 - 이미 저장된 항목은 건너뜀 (재시작 가능)"""
+    pending = pending_pairs(df)
+    if limit is not None:
+        pending = pending[:limit]
+    print(f"🤖 요약 생성 대상: {len(pending)}개 (동시 {workers}개)")
+    if not pending:
+        return 0
+
+    client = anthropic.Anthropic(api_key=_api_key())
+    started = time.time()
+    done = failed = 0
+
+    def _summarize(pair):
+        title, category = pair
+        try:
+            return pair, request_summary(title, category, client)
+        except Exception as e:
+            print(f"   ⚠️ 요약 실패 ({title[:40]}): {e}")
+            return pair, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(pending), checkpoint_size):
+            chunk = pending[start:start + checkpoint_size]
+            results = {}
+            for (title, category), summary in pool.map(_summarize, chunk):
+                if summary:
+                    results[summary_key(title, category)] = summary
+                else:
+                    failed += 1
+            # 체크포인트 단위로 저장 - 중단되어도 여기까지는 유지됨
+            _STORE.put_many(results)
+            done += len(results)
+            print(f"   💾 {done + failed}/{len(pending)} 처리 (실패 {failed}, {time.time() - started:.0f}초)")
+
+    print(f"✅ 요약 생성 완료: {done}개 저장, {failed}개 실패 (다시 실행하면 실패 항목만 재시도)")
+    return done
+
+
+if __name__ == "__main__":
+    # 오프라인 작업: ANTHROPIC_API_KEY=... python -m utils.project_summaries --workers 4
+    parser = argparse.ArgumentParser(description="ISEF 프로젝트 요약 일괄 생성")
+    parser.add_argument("--db", default=XLSX_PATH, help="원본 엑셀 경로")
+    parser.add_argument("--parquet", default=PARQUET_PATH, help="Parquet 저장소 경로")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="동시 요청 수")
+    parser.add_argument("--limit", type=int, default=None, help="이번 실행에서 처리할 최대 개수")
+    args = parser.parse_args()
+
+    precompute_summaries(ensure_store(args.db, args.parquet), workers=args.workers, limit=args.limit)
@@ -0,0 +1,195 @@
+from collections import namedtuple
+
+import anthropic
+import streamlit as st
+
+from utils.keyword_matcher import GLOSSARY
+from utils.translation_cache import (
+    lookup_keyword_translations,
+    lookup_phrase_translation,
+    normalize_term,
+    parse_keyword_lines,
+    store_keyword_translations,
+    store_phrase_translation,
+)
+
+# 🧠 검색어 분석 결과 - 주제 하나당 한 번 만들어 내부 DB 검색과 arXiv 검색이 함께 사용
+QueryAnalysis = namedtuple("QueryAnalysis", [
+    "text",            # 원본 입력
+    "normalized",      # 정규화된 입력 (캐시 키)
+    "glossary_terms",  # 용어집에서 찾은 한국어 용어
+    "unknown_terms",   # 용어집으로 풀지 못한 어간 (모델 번역 대상)
+    "keywords",        # 내부 DB 검색용 영어 키워드
+    "english_phrase",  # arXiv 검색용 영어 문장 (with_phrase=False로 분석했고 캐시에도 없으면 None)
+    "query_key",       # 키워드 집합의 정규 키 (어순과 무관, 결과 캐시 키)
+])
+
+TRANSLATION_MODEL = "claude-3-5-sonnet-20241022"
+MAX_KEYWORDS = 10
+_PHRASE_PREFIX = "EN:"
+
+
+def _has_hangul(text):
+    return any('가' <= c <= '힣' for c in text)
+
+
+def request_translation(text=None, terms=()):
+    """한 번의 Claude 호출로 검색어 문장 번역과 용어별 키워드 번역을 함께 요청
+
+    반환: (영어 문장 또는 None, {정규화된 용어: [영어 키워드]}) - 실패 시 예외
+    """
+    terms = list(terms)
+    instructions = []
+    parts = []
+    if text:
+        instructions.append(f"첫 줄에는 '{_PHRASE_PREFIX} 주제 전체의 자연스러운 영어 번역'을 써주세요.")
+        parts.append(f"주제: {text}")
+    if terms:
+        instructions.append(
+            "다음 한국어 과학 용어들을 영어로 번역해주세요. 각 용어마다 관련 영어 키워드를 2-3개씩 포함해서 "
+            "한 줄에 한 용어씩 '한국어 용어: 영어 키워드1, 영어 키워드2' 형식으로 답해주세요."
+        )
+        parts.append("번역할 한국어:\n" + "\n".join(terms))
+
+    client = anthropic.Anthropic(api_key=st.secrets["api"]["claude_key"])
+    response = client.messages.create(
+        model=TRANSLATION_MODEL,
+        max_tokens=100 + 40 * len(terms),
+        system=" ".join(instructions) + " 다른 설명은 하지 마세요.",
+        messages=[
+            {"role": "user", "content": "\n\n".join(parts)}
+        ]
+    )
+
+    phrase = None
+    keyword_lines = []
+    for line in response.content[0].text.strip().splitlines():
+        if line.strip().upper().startswith(_PHRASE_PREFIX):
+            phrase = line.strip()[len(_PHRASE_PREFIX):].strip() or None
+        else:
+            keyword_lines.append(line)
+    return phrase, parse_keyword_lines("\n".join(keyword_lines))
+
+
+class _IncompleteAnalysis(Exception):
+    """번역 실패로 대체값이 들어간 분석 결과 - 예외로 꺼내 st.cache_data에 남지 않게 함"""
+
+    def __init__(self, analysis):
+        super().__init__("번역 실패로 불완전한 검색어 분석")
+        self.analysis = analysis
+
+
+def interleave_keywords(groups):
+    """용어별 키워드 묶음 → 각 묶음의 1번째, 2번째, ... 순서로 번갈아 모은 목록"""
+    keywords = []
+    for rank in range(max((len(group) for group in groups), default=0)):
+        keywords.extend(group[rank] for group in groups if rank < len(group))
+    return keywords
+
+
+def query_key(keywords):
+    """키워드 목록 → 정규 키 (소문자, 중복 제거, 정렬)"""
+    return " ".join(sorted({k.lower() for k in keywords}))
+
+
+def analyze_query(text, with_phrase=True):
+    """검색어 → QueryAnalysis (용어집 → 번역 캐시 → 모델 순, 모델 호출은 최대 한 번)
+
+    with_phrase=False면 arXiv용 문장 번역은 요청하지 않음 (내부 DB 검색만 하는 경우)
+    번역에 실패한 결과는 캐시하지 않음 - 다음 호출에서 다시 번역을 시도
+    """
+    try:
+        return _analyze_query(str(text), with_phrase)
+    except _IncompleteAnalysis as e:
+        return e.analysis
+
+
+def with_english_phrase(analysis):
+    """문장 번역 없이 만든 분석 결과라면 문장 번역을 포함해 다시 분석 (나머지는 캐시 재사용)"""
+    if analysis.english_phrase is not None:
+        return analysis
+    return analyze_query(analysis.text, with_phrase=True)
+
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def _analyze_query(text, with_phrase):
+    print(f"📝 입력 텍스트 분석: '{text.lower()}'")
+    scan = GLOSSARY.scan(text)
+
+    # 1단계: 용어집에서 찾기 - 조사/어미를 떼고 가장 긴 용어 단위로 (같은 용어는 한 번만)
+    glossary_terms = []
+    unknown_terms = []
+    for word in scan.words:
+        for korean in word.terms:
+            if korean in glossary_terms:
+                continue
+            glossary_terms.append(korean)
+            print(f"   ✅ 매핑: '{korean}' → {GLOSSARY.english(korean)}")
+        # 용어집으로 풀지 못한 어간만 번역 대상
+        if word.unknown and word.unknown not in unknown_terms:
+            unknown_terms.append(word.unknown)
+
+    # 2단계: 번역 캐시 조회 - 없는 것(용어 번역, 문장 번역)만 한 번의 호출로 요청
+    translations = lookup_keyword_translations(unknown_terms) if unknown_terms else {}
+    missing_terms = [t for t in unknown_terms if normalize_term(t) not in translations]
+    english_phrase = text
+    need_phrase = False
+    failed = False
+    if _has_hangul(text):
+        english_phrase = lookup_phrase_translation(text)
+        need_phrase = with_phrase and english_phrase is None
+        if english_phrase:
+            print(f"   💾 번역 (캐시): '{text}' → '{english_phrase}'")
+
+    if missing_terms or need_phrase:
+        print(f"   🌐 번역 요청: 문장 {'포함' if need_phrase else '제외'}, 용어 {missing_terms}")
+        try:
+            phrase, fresh = request_translation(text if need_phrase else None, missing_terms)
+            if fresh:
+                store_keyword_translations(fresh)
+                translations.update(fresh)
+            if phrase:
+                store_phrase_translation(text, phrase)
+                english_phrase = phrase
+            print(f"   🤖 Claude 번역 결과: '{phrase}', {fresh}")
+        except Exception as e:
+            print(f"   ⚠️ Claude 번역 실패: {e}")
+            failed = True
+    if not english_phrase and with_phrase:
+        english_phrase = text  # 번역 실패 시 원본 검색어 사용
+
+    # 3단계: 키워드 구성 - 용어/단어를 정렬해 모아서 어순과 무관하게 같은 키워드 (운동 체지방 = 체지방 운동)
+    # 용어별 키워드 묶음에서 한 개씩 번갈아 가져옴 - 개수 제한에 걸려도 모든 용어가 포함되도록
+    groups = [GLOSSARY.english(korean) for korean in sorted(glossary_terms)]
+    for term in sorted(unknown_terms):
+        # 번역되지 않은 용어는 원본 사용
+        groups.append(translations.get(normalize_term(term), [term]))
+
+    # 영어 단어는 그대로 사용 (단어 하나가 한 묶음)
+    if scan.latin_words:
+        groups.extend([word] for word in sorted(scan.latin_words, key=str.lower))
+        print(f"   📖 영어 단어 추가: {scan.latin_words}")
+    keywords = interleave_keywords(groups)
+
+    # 4단계: 추가 단어 처리
+    if not keywords:
+        all_words = text.replace(',', ' ').replace('.', ' ').split()
+        keywords.extend(word for word in all_words if len(word) >= 2)
+        print(f"   📝 모든 단어 추가: {all_words}")
+
+    # 중복 제거 (처음 나온 순서 유지) 및 최대 10개로 제한
+    unique_keywords = list(dict.fromkeys(keywords))[:MAX_KEYWORDS]
+
+    print(f"🔍 최종 키워드: '{text}' → {unique_keywords}, 영어 문장: '{english_phrase}'")
+    analysis = QueryAnalysis(
+        text=text,
+        normalized=normalize_term(text),
+        glossary_terms=tuple(glossary_terms),
+        unknown_terms=tuple(unknown_terms),
+        keywords=tuple(unique_keywords),
+        english_phrase=english_phrase,
+        query_key=query_key(unique_keywords),
+    )
+    if failed:
+        raise _IncompleteAnalysis(analysis)
+    return analysis
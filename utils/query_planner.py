@@ -0,0 +1,178 @@
+import queue
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.arxiv_client import CONNECT_TIMEOUT, READ_TIMEOUT, build_query_url, iter_entries
+
+# 🧭 arXiv 검색어 변형 계획 - 순위대로 (전체 AND → 앞 2개 단어 AND → OR)
+QueryVariant = namedtuple("QueryVariant", ["label", "search_term"])
+
+# 변형 검색용 작업 풀 (모델 호출용 공용 풀과 분리)
+_FETCH_POOL = ThreadPoolExecutor(max_workers=6, thread_name_prefix="lsai-arxiv")
+
+PLAN_TIMEOUT = CONNECT_TIMEOUT + READ_TIMEOUT + 5  # 페이지 하나의 전체 대기 제한 (초)
+MAX_FETCHES_PER_PAGE = 4  # 중복이 많은 변형에서 한 페이지를 채우려고 반복 요청하는 횟수 제한
+
+
+def plan_query_variants(english_query):
+    """영어 검색어 → 순위가 매겨진 검색어 변형 목록 (중복 제거)"""
+    words = english_query.split()
+    if len(words) <= 1:
+        return [QueryVariant("single", english_query.strip())]
+
+    variants = [QueryVariant("and", " AND ".join(words))]
+    if len(words) > 2:
+        # 가장 중요한 1-2개 단어만 사용
+        variants.append(QueryVariant("top2", " AND ".join(words[:2])))
+    variants.append(QueryVariant("or", " OR ".join(words)))
+    return variants
+
+
+_DONE = object()  # 요청 하나가 끝났음을 알리는 표시
+
+
+def entry_id(entry):
+    """중복 제거용 항목 ID (없으면 링크)"""
+    return entry.get("id") or entry.get("link")
+
+
+class _EntryStream:
+    """작업 풀에서 변형 요청 하나를 받아오며 항목이 파싱되는 대로 큐에 넣음 - 소비하는 쪽은 도착하는 대로 꺼내 씀"""
+
+    def __init__(self, fetch, url, count):
+        self.count = count  # 요청한 항목 수
+        self.received = 0  # 지금까지 꺼낸 항목 수 (중복 포함)
+        self.error = None
+        self._queue = queue.Queue()
+        _FETCH_POOL.submit(self._run, fetch, url)
+
+    def _run(self, fetch, url):
+        try:
+            for entry in fetch(url):
+                self._queue.put(entry)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._queue.put(_DONE)
+
+    def get(self, timeout):
+        """다음 항목 (끝나면 _DONE) - timeout초 안에 안 오면 queue.Empty"""
+        entry = self._queue.get(timeout=timeout)
+        if entry is not _DONE:
+            self.received += 1
+        return entry
+
+
+class VariantPager:
+    """검색어 변형별 다음 요청 위치와 아직 보여주지 않은 결과를 기억하는 페이지 단위 검색
+
+    - 변형을 처음 요청할 때(첫 페이지, 또는 앞 변형이 끝났을 때)는 뒤 순위 변형도 함께 동시에 요청
+      → 결과가 없는 주제도 왕복 한 번 (요청마다 속도 제한 토큰 하나씩 사용)
+    - 페이지는 순위가 높은 변형의 결과부터 채우고, 항목은 응답 전체를 기다리지 않고 파싱되는 대로 내보냄
+    - 페이지가 채워지면 나머지 응답/뒤 순위 요청은 그대로 두었다가 다음 페이지 맨 앞에 사용
+    - '더 보기'는 결과를 채우던 변형만 이어서 요청 (대부분 페이지당 요청 한 번)
+    """
+
+    def __init__(self, variants, fetch=iter_entries, timeout=PLAN_TIMEOUT):
+        self.variants = list(variants)
+        self.fetch = fetch  # URL → 항목 iterator (또는 목록)
+        self.timeout = timeout
+        self.offsets = [0] * len(self.variants)  # 변형별 다음 요청 시작 위치
+        self.done = [False] * len(self.variants)  # 더 가져올 결과가 없는 변형
+        self.buffers = [deque() for _ in self.variants]  # 가져왔지만 아직 보여주지 않은 항목 (중복 제거됨)
+        self.pending = [None] * len(self.variants)  # 변형별 진행 중인 요청 (_EntryStream)
+        self._seen = set()
+
+    @property
+    def exhausted(self):
+        """모든 변형을 끝까지 가져왔고 남은 항목도 없는지"""
+        return all(self.done) and not any(self.buffers)
+
+    def _submit(self, rank, count):
+        """rank번째 변형의 다음 count개 요청 시작 (이미 진행 중이거나 끝난 변형은 건너뜀)"""
+        if self.pending[rank] is not None or self.done[rank]:
+            return
+        variant = self.variants[rank]
+        print(f"arXiv 검색 변형 요청 ({variant.label}, {self.offsets[rank]}번째부터): {variant.search_term}")
+        url = build_query_url(variant.search_term, start=self.offsets[rank], max_results=count)
+        self.pending[rank] = _EntryStream(self.fetch, url, count)
+
+    def _next_entry(self, rank, timeout):
+        """rank번째 변형의 진행 중인 요청에서 다음 항목 (이미 본 항목이면 None, 요청이 끝나면 _DONE)
+
+        timeout초 안에 안 오면 queue.Empty (요청은 진행 중으로 남김), 요청이 실패하면 그 예외
+        """
+        stream = self.pending[rank]
+        entry = stream.get(timeout)
+        if entry is _DONE:
+            self.pending[rank] = None
+            if stream.error is not None:
+                raise stream.error  # 다음 페이지에서 같은 위치부터 다시 요청
+            print(f"검색 결과 수 ({self.variants[rank].label}): {stream.received}")
+            self.offsets[rank] += stream.received
+            if stream.received < stream.count:
+                self.done[rank] = True
+            return _DONE
+        key = entry_id(entry)
+        if key in self._seen:
+            return None
+        self._seen.add(key)
+        return entry
+
+    def next_page(self, page_size=5):
+        """다음 page_size개 목록 (더 없으면 빈 목록)"""
+        return list(self.iter_page(page_size))
+
+    def iter_page(self, page_size=5):
+        """다음 page_size개를 도착하는 대로 내보내는 iterator
+
+        아무 결과 없이 시간이 초과되거나 요청한 변형이 모두 실패하면 예외를 발생시켜 '결과 없음'과 구분되게 함
+        """
+        deadline = time.monotonic() + self.timeout
+        count, errors, succeeded = 0, [], False
+        for rank in range(len(self.variants)):
+            buffer = self.buffers[rank]
+            fetches = 0
+            while count < page_size:
+                if buffer:
+                    count += 1
+                    yield buffer.popleft()
+                    continue
+                if self.done[rank]:
+                    break
+                if self.pending[rank] is None:
+                    if fetches >= MAX_FETCHES_PER_PAGE:
+                        # 이 변형을 다 보여주지 못했으면 다음 변형으로 넘어가지 않음 (순위 유지)
+                        self._finish(count, errors, succeeded)
+                        return
+                    fetches += 1
+                    # 처음 요청하는 변형이면 뒤 순위 변형도 함께 요청 - 모자랄 때 바로 이어 씀
+                    ranks = range(rank, len(self.variants)) if self.offsets[rank] == 0 else [rank]
+                    for r in ranks:
+                        self._submit(r, page_size)
+                try:
+                    entry = self._next_entry(rank, max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    print(f"⏱️ arXiv 검색 변형 시간 초과 ({self.variants[rank].label}, {self.timeout}초)")
+                    self._finish(count, errors, succeeded, timed_out=True)
+                    return
+                except Exception as e:
+                    # 실패한 변형은 이번 페이지에서만 건너뜀 (다음 페이지에서 다시 요청)
+                    print(f"⚠️ arXiv 검색 변형 실패 ({self.variants[rank].label}): {e}")
+                    errors.append(e)
+                    break
+                succeeded = True
+                if entry is not None and entry is not _DONE:
+                    buffer.append(entry)
+            if count >= page_size:
+                break
+        self._finish(count, errors, succeeded)
+
+    def _finish(self, count, errors, succeeded, timed_out=False):
+        # 결과가 하나도 없을 때 시간 초과였거나 요청한 변형이 모두 실패했다면 예외 전달
+        if count == 0:
+            if timed_out:
+                raise TimeoutError(f"arXiv 검색 시간 초과 ({self.timeout}초)")
+            if errors and not succeeded:
+                raise errors[0]
@@ -0,0 +1,54 @@
+import numpy as np
+
+# 🔥 점진적으로 낮춰가며 시도하는 유사도 임계값
+SCORE_THRESHOLDS = (0.05, 0.02, 0.01, 0.005, 0.001)
+
+# 임계값을 넘는 결과가 이 개수 이하(1개 이상)가 되면 해당 임계값 선택
+MAX_THRESHOLD_RESULTS = 20
+
+
+def top_k_indices(scores, k):
+    """점수 배열에서 상위 k개 행 번호를 내림차순으로 반환 (argpartition, O(n))"""
+    scores = np.asarray(scores)
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    # k개만 정렬 - 동점은 행 번호 순서로 고정
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+def threshold_counts(top_scores, thresholds=SCORE_THRESHOLDS):
+    """내림차순 상위 점수에서 각 임계값을 넘는 개수 계산 (한 번의 탐색)"""
+    ascending = np.asarray(top_scores)[::-1]
+    return len(ascending) - np.searchsorted(ascending, thresholds, side='right')
+
+
+def choose_threshold(top_scores, thresholds=SCORE_THRESHOLDS, max_count=MAX_THRESHOLD_RESULTS):
+    """상위 후보 점수만으로 임계값 선택 - 결과 수가 1~max_count개가 되는 첫 임계값, 없으면 마지막 값
+
+    top_scores는 내림차순이며 최소 max_count + 1개(또는 전체)여야 개수 판정이 정확함
+    """
+    counts = threshold_counts(top_scores, thresholds)
+    for threshold, count in zip(thresholds, counts):
+        if 1 <= count <= max_count:
+            return threshold, counts
+    return thresholds[-1], counts
+
+
+def select_from_candidates(candidates, candidate_scores, max_results,
+                           thresholds=SCORE_THRESHOLDS, max_count=MAX_THRESHOLD_RESULTS):
+    """내림차순 후보 목록에서 임계값을 적용해 최종 max_results개 선택
+
+    반환: (선택된 행 번호, 선택된 점수, 선택 임계값, 임계값별 개수)
+    """
+    candidates = np.asarray(candidates)
+    candidate_scores = np.asarray(candidate_scores)
+    threshold, counts = choose_threshold(candidate_scores, thresholds, max_count)
+    keep = candidate_scores > threshold
+    return candidates[keep][:max_results], candidate_scores[keep][:max_results], threshold, counts
+
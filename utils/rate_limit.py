@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import threading
+import time
+
+from utils.kv_store import CACHE_DB_PATH
+
+
+class TokenBucket:
+    """프로세스 내 토큰 버킷 - 초당 rate개씩 채워지고 최대 burst개까지 쌓임"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_take(self):
+        """토큰 하나를 가져가면 0, 아니면 다음 토큰까지 기다릴 시간(초)"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout=None):
+        """토큰을 얻을 때까지 대기 - timeout초 안에 못 얻으면 TimeoutError"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._try_take()
+            if wait <= 0:
+                return
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError("요청 속도 제한 대기 시간 초과")
+            time.sleep(wait)
+
+
+class SQLiteTokenBucket(TokenBucket):
+    """여러 프로세스가 공유하는 토큰 버킷 - 상태를 SQLite 한 행에 두고 트랜잭션으로 갱신"""
+
+    def __init__(self, name, rate, burst=1, path=CACHE_DB_PATH):
+        super().__init__(rate, burst)
+        self.name = name
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        """스레드별 연결 (fork 후에는 새로 연결)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _try_take(self):
+        # 프로세스 간 공유이므로 벽시계 시간 사용
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated_at FROM rate_limits WHERE name = ?", (self.name,)).fetchone()
+            tokens = self.burst if row is None else min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.name, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+class SingleFlight:
+    """같은 키의 동시 호출을 하나로 합침 - 먼저 온 호출만 실행하고 나머지는 그 결과를 함께 받음"""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+            self.waiters = 0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        """func(*args, **kwargs) 실행 결과 반환 - 예외도 모든 대기자에게 전달"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = func(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            if call.waiters:
+                print(f"🔗 동시 요청 {call.waiters + 1}개를 한 번의 요청으로 처리")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
@@ -0,0 +1,84 @@
+import copy
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# 🗂️ 검색 결과 캐시 기본 한도 (프로세스 전체 공유)
+DEFAULT_MAX_ENTRIES = int(os.environ.get("LSAI_RESULT_CACHE_ENTRIES", 256))
+DEFAULT_MAX_BYTES = int(os.environ.get("LSAI_RESULT_CACHE_MB", 16)) * 1024 * 1024
+DEFAULT_TTL = int(os.environ.get("LSAI_RESULT_CACHE_TTL", 3600))  # 초 (0 이하면 만료 없음)
+
+
+class LRUResultCache:
+    """항목 수와 메모리(직렬화 크기 기준) 한도, TTL이 있는 프로세스 공용 LRU 캐시
+
+    값은 꺼낼 때 복사해서 반환 - 호출한 쪽에서 결과를 고쳐도 캐시는 그대로
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._items = OrderedDict()  # 키 → (값, 크기, 저장 시각)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def get(self, key, default=None):
+        """키 조회 - 적중하면 최근 사용으로 이동 (TTL이 지난 항목은 삭제 후 실패 처리)"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and self.ttl > 0 and time.time() - item[2] > self.ttl:
+                del self._items[key]
+                self._bytes -= item[1]
+                self._counters["expired"] += 1
+                item = None
+            if item is None:
+                self._counters["misses"] += 1
+                return default
+            self._items.move_to_end(key)
+            self._counters["hits"] += 1
+            value = item[0]
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        """저장 후 한도를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (한도보다 큰 값은 저장 안 함)"""
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._items[key] = (value, size, time.time())
+            self._bytes += size
+            while len(self._items) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._items.popitem(last=False)
+                self._bytes -= evicted_size
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        """적중/실패/삭제/만료 횟수와 현재 항목 수, 메모리 사용량"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+            })
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -1,27 +1,37 @@
-import urllib.parse
-import feedparser
+import json
+import os
+import re
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 import anthropic  # OpenAI 대신 anthropic 사용
+from utils.arxiv_mirror import get_mirror
+from utils.kv_store import SQLiteStore
+from utils.parallel import map_in_order
+from utils.query_analysis import analyze_query, with_english_phrase
+from utils.query_planner import VariantPager, entry_id, plan_query_variants
 
-# 검색어 번역 함수 (Claude 버전)
+# 논문별 한국어 요약 제한 시간 (초) - 넘으면 대체 문구 사용
+SUMMARY_TIMEOUT = 20
+SUMMARY_FALLBACK = "한국어 요약을 생성할 수 없습니다."
+# 검색 결과가 이만큼 도착할 때마다 요약 시작 (나머지 항목을 받는 동안 요약이 진행됨)
+SUMMARY_CHUNK_SIZE = 3
+
+# 요약 묶음용 작업 풀 (안에서 쓰는 map_in_order 공용 풀과 분리해 서로 기다리며 막히지 않게 함)
+_SUMMARY_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lsai-summary")
+
+# 💾 논문별 요약 저장소 - 요약은 논문(arXiv ID + 버전)에만 의존하므로 주제와 무관하게 재사용
+_SUMMARY_STORE = SQLiteStore("arxiv_summaries")
+_ARXIV_ID_PATTERN = re.compile(r"arxiv\.org/abs/([^?#\s]+?)/?$")
+
+# 🗄️ 검색 모드 - "live": arXiv API, "local": 로컬 미러 (python -m utils.arxiv_mirror 로 빌드)
+ARXIV_MODE = os.environ.get("LSAI_ARXIV_MODE", "live").lower()
+# 로컬 미러에 결과가 없거나 미러가 없을 때 arXiv API로 재시도할지 여부
+ARXIV_LIVE_FALLBACK = os.environ.get("LSAI_ARXIV_LIVE_FALLBACK", "1") != "0"
+
+# 검색어 번역 함수 - 공용 검색어 분석 결과의 영어 문장
 def translate_to_english(query):
-    """한글 검색어를 영어로 번역"""
-    try:
-        client = anthropic.Anthropic(api_key=st.secrets["api"]["claude_key"])
-        response = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=100,  # 번역은 짧으니 적은 토큰
-            system="한국어를 영어로 번역해주세요. 번역만 제공하고 다른 설명은 하지 마세요.",
-            messages=[
-                {"role": "user", "content": query}
-            ]
-        )
-        translated = response.content[0].text.strip()
-        print(f"번역: '{query}' → '{translated}'")
-        return translated
-    except Exception as e:
-        print(f"번역 오류: {e}")
-        return query  # 오류 발생 시 원본 검색어 사용
+    """한글 검색어를 영어로 번역 (analyze_query 결과, 번역 캐시 우선)"""
+    return analyze_query(query).english_phrase
 
 # 영문 초록을 한국어로 요약하는 함수 (Claude 버전)
 def summarize_in_korean(summary):
@@ -44,87 +54,264 @@ def summarize_in_korean(summary):
         return korean_summary
     except Exception as e:
         print(f"한국어 요약 오류: {e}")
-        return "한국어 요약을 생성할 수 없습니다."
+        return SUMMARY_FALLBACK
 
-# arXiv 검색 함수 (Claude 버전)
-def search_arxiv(query, max_results=5):
-    # 1. 한글 검색어 번역
-    if any('\uAC00' <= c <= '\uD7A3' for c in query):  # 한글 포함 확인
-        english_query = translate_to_english(query)
-    else:
-        english_query = query
-        
-    # 2. 검색 쿼리 형식 최적화
-    base_url = "http://export.arxiv.org/api/query"
+# 여러 초록을 한 번의 요청으로 요약 (ID로 구분된 JSON 응답)
+def summarize_batch_in_korean(summaries):
+    """영문 초록 목록을 한 번의 Claude 호출로 요약 - 입력 순서대로 한국어 요약 목록 반환
     
-    # 검색어를 AND로 결합하여 더 많은 결과 반환
-    words = english_query.split()
-    if len(words) > 1:
-        search_term = " AND ".join(words)
-    else:
-        search_term = english_query
+    응답을 해석할 수 없거나 빠진 항목은 개별 요약 호출로 보완
+    """
+    summaries = list(summaries)
+    if not summaries:
+        return []
+    
+    parsed = {}
+    try:
+        # 초록이 너무 길 경우 앞부분만 사용
+        numbered = "\n\n".join(
+            f"[{i}]\n{summary[:1000]}" for i, summary in enumerate(summaries, start=1)
+        )
         
-    encoded_query = urllib.parse.quote(search_term)
-    query_url = f"{base_url}?search_query=all:{encoded_query}&start=0&max_results={max_results}"
+        client = anthropic.Anthropic(api_key=st.secrets["api"]["claude_key"])
+        response = client.messages.create(
+            model="claude-3-5-sonnet-20241022",
+            max_tokens=200 * len(summaries),  # 초록당 요약 토큰 수
+            system=(
+                "다음 번호가 붙은 영문 초록들을 각각 1-2문장의 간결한 한국어로 요약해주세요. "
+                "전문 용어는 가능한 그대로 유지하되, 고등학생이 이해할 수 있는 수준으로 작성해주세요. "
+                '다른 설명 없이 {"1": "요약", "2": "요약"} 형태의 JSON 객체로만 답해주세요.'
+            ),
+            messages=[
+                {"role": "user", "content": numbered}
+            ]
+        )
+        parsed = parse_batch_summaries(response.content[0].text, len(summaries))
+    except Exception as e:
+        print(f"일괄 한국어 요약 오류: {e}")
     
-    print(f"arXiv API 요청 URL: {query_url}")
+    # 빠진 항목만 개별 호출 (동시 처리)
+    missing = [i for i in range(len(summaries)) if i not in parsed]
+    if missing:
+        print(f"일괄 요약 보완: {len(missing)}/{len(summaries)}개 개별 요약")
+        fallbacks = map_in_order(
+            lambda i: summarize_in_korean(summaries[i]),
+            missing,
+            lambda i, error: SUMMARY_FALLBACK,
+            timeout=SUMMARY_TIMEOUT,
+        )
+        parsed.update(zip(missing, fallbacks))
+    return [parsed[i] for i in range(len(summaries))]
+
+def parse_batch_summaries(text, count):
+    """'{"1": "...", ...}' 형태 응답 → {0부터 시작하는 위치: 요약} (해석 불가 시 빈 dict)"""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    parsed = {}
+    for key, value in data.items():
+        try:
+            position = int(str(key).strip("[] ")) - 1
+        except ValueError:
+            continue
+        if 0 <= position < count and isinstance(value, str) and value.strip():
+            parsed[position] = value.strip()
+    return parsed
+
+# 💾 논문 요약 캐시 조회/저장
+def paper_key(entry):
+    """arXiv 항목의 'ID+버전' 키 (예: 2101.00001v2) - 알 수 없으면 None"""
+    match = _ARXIV_ID_PATTERN.search(str(entry.get("id", "")).strip())
+    return match.group(1) if match else None
+
+def trim_abstract(abstract):
+    """긴 영문 초록은 앞부분만 표시"""
+    if len(abstract) > 300:
+        return abstract[:297] + "..."
+    return abstract
+
+def cached_paper_summaries(entries):
+    """항목별 저장된 {'korean', 'abstract'} 조회 - 없으면 요약 후 저장 (입력 순서대로 반환)"""
+    keys = [paper_key(entry) for entry in entries]
+    try:
+        cached = _SUMMARY_STORE.get_many(k for k in keys if k)
+    except Exception as e:
+        print(f"⚠️ 논문 요약 캐시 조회 실패: {e}")
+        cached = {}
     
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    print(f"💾 논문 요약 캐시 적중: {len(entries) - len(missing)}/{len(entries)}")
+    
+    papers = [cached.get(key) for key in keys]
+    if missing:
+        abstracts = [entries[i].get("summary", "").replace('\n', ' ').strip() for i in missing]
+        korean_summaries = summarize_batch_in_korean(abstracts)
+        fresh = {}
+        for i, abstract, korean_summary in zip(missing, abstracts, korean_summaries):
+            papers[i] = {"korean": korean_summary, "abstract": trim_abstract(abstract)}
+            # 실패 대체 문구는 저장하지 않음 (다음에 다시 시도)
+            if keys[i] and korean_summary != SUMMARY_FALLBACK:
+                fresh[keys[i]] = papers[i]
+        try:
+            _SUMMARY_STORE.put_many(fresh)
+        except Exception as e:
+            print(f"⚠️ 논문 요약 캐시 저장 실패: {e}")
+    return papers
+
+# 🗄️ 로컬 미러 검색 (오프라인)
+def search_local_mirror(english_query, max_results=5, start=0):
+    """로컬 arXiv 미러에서 검색 - 미러가 없거나 실패하면 빈 목록"""
     try:
-        # Feed 파싱
-        feed = feedparser.parse(query_url)
-        
-        if hasattr(feed, 'status'):
-            print(f"arXiv API 응답 상태: {feed.status}")
-        
-        entries = feed.entries
-        print(f"검색 결과 수: {len(entries)}")
-        
-        if not entries:
-            # 검색 실패 시 더 일반적인 용어로 재시도
-            if len(words) > 1:
-                # 가장 중요한 1-2개 단어만 사용해서 재검색
-                important_words = words[:2]
-                simplified_query = " ".join(important_words)
-                encoded_simplified = urllib.parse.quote(simplified_query)
-                simplified_url = f"{base_url}?search_query=all:{encoded_simplified}&start=0&max_results={max_results}"
-                
-                print(f"단순화된 검색 시도: {simplified_url}")
-                simplified_feed = feedparser.parse(simplified_url)
-                entries = simplified_feed.entries
-                
-                if not entries:
-                    return [{
-                        "title": "검색 결과 없음",
-                        "summary": f"해당 주제와 관련된 아카이브(arXiv) 논문을 찾을 수 없습니다. (검색어: {english_query})",
-                        "link": "",
-                        "source": "arXiv"
-                    }]
-        
-        # 결과 구성
-        results = []
-        for entry in entries:
-            title = entry.title.replace('\n', ' ').strip()
-            original_summary = entry.get("summary", "").replace('\n', ' ').strip()
-            
-            # 영문 초록을 한국어로 요약
-            korean_summary = summarize_in_korean(original_summary)
-            
-            # 긴 요약은 일부만 표시
-            if len(original_summary) > 300:
-                displayed_summary = original_summary[:297] + "..."
-            else:
-                displayed_summary = original_summary
-                
-            link = entry.link
+        mirror = get_mirror()
+        if mirror is None:
+            print("⚠️ 로컬 arXiv 미러 없음 (python -m utils.arxiv_mirror 로 빌드)")
+            return []
+        entries = mirror.search(english_query, max_results, start)
+        print(f"로컬 미러 검색 결과 수: {len(entries)}")
+        return entries
+    except Exception as e:
+        print(f"⚠️ 로컬 미러 검색 실패: {e}")
+        return []
+
+# 🌐 arXiv API 검색
+def build_results(entries):
+    """arXiv 항목(목록 또는 도착하는 대로 나오는 iterator) → 화면 표시용 결과
+    
+    SUMMARY_CHUNK_SIZE개가 모일 때마다 요약을 시작 (캐시 우선, 없는 것만 일괄 요청)
+    """
+    chunks, futures, chunk = [], [], []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) >= SUMMARY_CHUNK_SIZE:
+            chunks.append(chunk)
+            futures.append(_SUMMARY_POOL.submit(cached_paper_summaries, chunk))
+            chunk = []
+    if chunk:
+        chunks.append(chunk)
+        futures.append(_SUMMARY_POOL.submit(cached_paper_summaries, chunk))
+    
+    results = []
+    for chunk, future in zip(chunks, futures):
+        try:
+            papers = future.result()
+        except Exception as e:
+            print(f"한국어 요약 오류: {e}")
+            papers = [
+                {"korean": SUMMARY_FALLBACK,
+                 "abstract": trim_abstract(entry.get("summary", "").replace('\n', ' ').strip())}
+                for entry in chunk
+            ]
+        for entry, paper in zip(chunk, papers):
+            title = entry.get("title", "").replace('\n', ' ').strip()
+            link = entry.get("link", "")
             
             results.append({
                 "title": title,
-                "summary": f"[한국어 요약] {korean_summary}\n\n[영문 원본] {displayed_summary}",
+                "summary": f"[한국어 요약] {paper['korean']}\n\n[영문 원본] {paper['abstract']}",
                 "link": link,
                 "source": "arXiv"
             })
-                
-        return results
+    return results
+
+# 📑 페이지 단위 검색 커서
+class ArxivCursor:
+    """arXiv 검색 결과를 한 페이지씩 가져오는 커서 - 요청한 페이지만 검색/요약하고 결과를 보관
+    
+    세션 상태에 그대로 저장해 두었다가 '더 보기' 때 next_page()를 호출
+    """
+    
+    def __init__(self, query, page_size=5, analysis=None):
+        self.query = query
+        self.page_size = page_size
+        self.analysis = analysis
+        self.english_query = None
+        self.source = "local" if ARXIV_MODE == "local" else "live"
+        self.pages = []
+        self.offset = 0  # 로컬 미러에서 다음 페이지의 검색 결과 시작 위치
+        self.exhausted = False
+        self._seen = set()
+        self._pager = None  # arXiv API 검색 상태 (변형별 요청 위치 + 아직 보여주지 않은 결과)
+    
+    @property
+    def results(self):
+        """지금까지 가져온 모든 결과 (페이지 순서대로)"""
+        return [result for page in self.pages for result in page]
+    
+    def _iter_entries(self):
+        if self.source == "local":
+            entries = search_local_mirror(self.english_query, self.page_size, self.offset)
+            if entries or self.offset > 0 or not ARXIV_LIVE_FALLBACK:
+                return entries
+            print("로컬 미러 결과 없음 → arXiv API로 재시도")
+            self.source = "live"
+        if self._pager is None:
+            # 검색어 변형(전체 AND / 앞 2개 단어 / OR)을 함께 요청하고 순위대로 합침
+            self._pager = VariantPager(plan_query_variants(self.english_query))
+        # 응답 전체를 기다리지 않고 파싱되는 대로 요약 단계로 넘김
+        return self._pager.iter_page(self.page_size)
+    
+    def next_page(self):
+        """다음 페이지를 검색해 요약하고 반환 (더 없으면 빈 목록)"""
+        if self.exhausted:
+            return []
+        if self.english_query is None:
+            # 1. 한글 검색어 번역 (공용 검색어 분석 결과 사용)
+            analysis = with_english_phrase(self.analysis) if self.analysis else analyze_query(self.query)
+            self.english_query = analysis.english_phrase
+        
+        entries = self._iter_entries()
+        received = 0
+        
+        def _fresh():
+            # 앞 페이지와 겹치는 항목은 ID로 중복 제거
+            nonlocal received
+            for entry in entries:
+                received += 1
+                key = entry_id(entry)
+                if key not in self._seen:
+                    self._seen.add(key)
+                    yield entry
+        
+        page = build_results(_fresh())
+        if self.source == "live":
+            more = not self._pager.exhausted
+        else:
+            self.offset += self.page_size
+            more = received >= self.page_size
+        if not more or not page:
+            self.exhausted = True
+        if not page:
+            return []
+        
+        self.pages.append(page)
+        return page
+
+def open_arxiv_cursor(query, page_size=5, analysis=None):
+    """검색어로 커서를 만들고 첫 페이지를 가져옴"""
+    cursor = ArxivCursor(query, page_size, analysis)
+    cursor.next_page()
+    return cursor
+
+def no_results(english_query):
+    """검색 결과가 없을 때 표시할 안내 항목"""
+    return [{
+        "title": "검색 결과 없음",
+        "summary": f"해당 주제와 관련된 아카이브(arXiv) 논문을 찾을 수 없습니다. (검색어: {english_query})",
+        "link": "",
+        "source": "arXiv"
+    }]
+
+# arXiv 검색 함수 (Claude 버전)
+def search_arxiv(query, max_results=5, analysis=None):
+    try:
+        cursor = open_arxiv_cursor(query, max_results, analysis)
+        return cursor.results or no_results(cursor.english_query)
         
     except Exception as e:
         print(f"arXiv API 오류: {str(e)}")
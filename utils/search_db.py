@@ -1,45 +1,137 @@
+import numpy as np
 import pandas as pd
 import os
 import streamlit as st
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-import anthropic
-import re
+from scipy import sparse
+from utils.db_index import INDEX_DIR, load_facet_index, load_meta, load_or_build_index
+from utils.db_store import PARQUET_PATH, XLSX_PATH, load_projects
+from utils.query_analysis import analyze_query
+from utils.project_summaries import lookup_summaries, request_summary, store_summary
+from utils.facet_index import FACETS, FacetIndex, filters_key, merge_facets
+from utils.index_segments import (
+    MAX_SEGMENTS,
+    SEGMENTS_DIR,
+    bm25_matching_docs,
+    bm25_search,
+    dense_search,
+    hashing_scores,
+    load_segments,
+    start_background_compaction,
+    tfidf_scores,
+)
+from utils.parallel import map_in_order
+from utils.result_cache import LRUResultCache
+from utils.ranking import MAX_THRESHOLD_RESULTS, SCORE_THRESHOLDS, select_from_candidates, top_k_indices
+from utils.bm25_index import BM25_DIR, SCORE_THRESHOLDS as BM25_THRESHOLDS, load_or_build_bm25_index
+from utils.dense_index import DENSE_DIR, DEFAULT_ENCODER, SCORE_THRESHOLDS as DENSE_THRESHOLDS, get_encoder, load_or_build_dense_index
+from utils.hashing_index import HASHING_DIR, SCORE_THRESHOLDS as HASHING_THRESHOLDS, load_or_build_hashing_index
 
-# 📁 내부 DB 경로
-DB_PATH = os.path.join("data", "ISEF Final DB.xlsx")
+# 📁 내부 DB 경로 (Parquet 우선, 없으면 엑셀)
+DB_PATH = XLSX_PATH
+
+# 🔧 검색 백엔드 선택: "tfidf" (기본, 코사인 유사도), "bm25" (역색인), "dense" (임베딩 k-NN),
+# "hashing" (어휘 사전 없는 해싱 TF-IDF, 바이그램 제한 없음)
+SEARCH_BACKENDS = ("tfidf", "bm25", "dense", "hashing")
+SEARCH_BACKEND = os.environ.get("LSAI_SEARCH_BACKEND", "tfidf").strip().lower()
+if SEARCH_BACKEND not in SEARCH_BACKENDS:
+    print(f"⚠️ 알 수 없는 검색 백엔드 '{SEARCH_BACKEND}' → tfidf 사용")
+    SEARCH_BACKEND = "tfidf"
+
+# 결과별 요약 생성 제한 시간 (초) - 넘으면 대체 문구 사용
+SUMMARY_TIMEOUT = 20
 
 # DB 파일 존재 확인
-print(f"📁 DB 파일 확인: {os.path.exists(DB_PATH)} ({DB_PATH})")
+print(f"📁 DB 파일 확인: Parquet {os.path.exists(PARQUET_PATH)}, 엑셀 {os.path.exists(DB_PATH)} ({DB_PATH})")
 
 # 전역 변수 - 사전 처리된 데이터 저장
 _DB_INITIALIZED = False
 _PROCESSED_DB = None
 _VECTORIZER = None
 _TFIDF_MATRIX = None
+_BM25_INDEX = None
+_DENSE_INDEX = None
+_HASHING_INDEX = None
+_FACET_INDEX = None
+_SEGMENTS = []
+
+# 🗂️ 검색 결과 캐시 - 정규 키(백엔드, 결과 수, 키워드 집합) 기준, 프로세스 전체 공유 LRU
+_RESULT_CACHE = LRUResultCache()
 
 # 초기화 함수 - 앱 시작 시 한 번만 실행
 @st.cache_data(ttl=86400, show_spinner=False)
 def initialize_db():
-    """데이터베이스와 벡터라이저 초기화"""
-    global _DB_INITIALIZED, _PROCESSED_DB, _VECTORIZER, _TFIDF_MATRIX
+    """데이터베이스와 벡터라이저 초기화 (사전 빌드된 인덱스를 메모리 매핑으로 로드)"""
+    return refresh_indexes()
+
+# 인덱스 (다시) 로드 - 세그먼트 추가/병합 후에도 호출
+def refresh_indexes():
+    """기본 인덱스와 추가 세그먼트를 로드해 전역 검색 상태 교체"""
+    global _DB_INITIALIZED, _PROCESSED_DB, _VECTORIZER, _TFIDF_MATRIX, _BM25_INDEX, _DENSE_INDEX, _HASHING_INDEX, _FACET_INDEX, _SEGMENTS
     
     try:
-        df = pd.read_excel(DB_PATH)
-        _PROCESSED_DB = df
+        # 해싱 백엔드는 해싱 행렬과 float32 IDF만 매핑 - TF-IDF 어휘/행렬은 로드하지도 빌드하지도 않음
+        hashing_index = None
+        if SEARCH_BACKEND == "hashing":
+            try:
+                hashing_index = load_or_build_hashing_index(DB_PATH, HASHING_DIR)
+            except Exception as e:
+                print(f"⚠️ 해싱 인덱스 로드 실패, TF-IDF 사용: {e}")
         
-        # 벡터화 미리 수행
-        corpus = df['Project Title'].fillna("").astype(str).tolist()
+        if hashing_index is not None:
+            # 메타데이터와 패싯은 해싱 인덱스와 함께 저장된 것을 사용
+            base_dir, base_backend = HASHING_DIR, "hashing"
+            df, vectorizer, tfidf_matrix = load_meta(HASHING_DIR), None, None
+        else:
+            # 엑셀 해시가 바뀌었으면 자동 재빌드, 아니면 저장된 인덱스를 그대로 매핑
+            base_dir, base_backend = INDEX_DIR, "tfidf"
+            df, vectorizer, tfidf_matrix = load_or_build_index(DB_PATH, INDEX_DIR)
         
-        _VECTORIZER = TfidfVectorizer(
-            analyzer='word', 
-            ngram_range=(1, 2),
-            lowercase=True,
-            max_features=5000  # 성능 최적화
-        )
+        # 새 연도 등 추가 세그먼트 - 기본 인덱스 뒤에 행 번호를 이어 붙임
+        segments = load_segments(base_dir, SEGMENTS_DIR, base_backend)
+        if segments:
+            df = pd.concat([df] + [segment.meta for segment in segments], ignore_index=True)
         
-        _TFIDF_MATRIX = _VECTORIZER.fit_transform(corpus)
+        # 패싯 필터용 값별 행 번호 목록 (인덱스 빌드 시 함께 저장됨)
+        try:
+            facet_index = load_facet_index(base_dir)
+            if segments:
+                parts = [(facet_index.facets, 0)] + [(segment.facets, segment.row_offset) for segment in segments]
+                facet_index = FacetIndex(merge_facets(parts), len(df))
+        except Exception as e:
+            print(f"⚠️ 패싯 색인 로드 실패, DB에서 직접 구성: {e}")
+            facet_index = FacetIndex.from_frame(df)
+        
+        _PROCESSED_DB = df
+        _VECTORIZER = vectorizer
+        _TFIDF_MATRIX = tfidf_matrix
+        _SEGMENTS = segments
+        _FACET_INDEX = facet_index
+        _HASHING_INDEX = hashing_index
+        
+        # BM25 백엔드 선택 시 역색인도 함께 매핑 (실패하면 TF-IDF로 검색)
+        if SEARCH_BACKEND == "bm25":
+            try:
+                _BM25_INDEX = load_or_build_bm25_index(DB_PATH, BM25_DIR)
+            except Exception as e:
+                print(f"⚠️ BM25 인덱스 로드 실패, TF-IDF 사용: {e}")
+                _BM25_INDEX = None
+        
+        # 임베딩 백엔드 선택 시 faiss 인덱스 로드 (인코더는 LSAI_DENSE_ENCODER로 교체 가능)
+        if SEARCH_BACKEND == "dense":
+            try:
+                _DENSE_INDEX = load_or_build_dense_index(get_encoder(DEFAULT_ENCODER), DB_PATH, DENSE_DIR)
+            except Exception as e:
+                print(f"⚠️ 임베딩 인덱스 로드 실패, TF-IDF 사용: {e}")
+                _DENSE_INDEX = None
         _DB_INITIALIZED = True
+        _RESULT_CACHE.clear()  # 인덱스가 새로 로드되면 이전 결과는 버림
+        
+        # 세그먼트가 많이 쌓이면 백그라운드에서 병합 후 다시 로드
+        if len(segments) > MAX_SEGMENTS:
+            print(f"🗜️ 세그먼트 {len(segments)}개 → 백그라운드 병합 시작")
+            start_background_compaction(on_done=refresh_indexes)
         
         print(f"✅ 내부 DB 초기화 완료: {len(df)} 개 논문 로드됨")
         return True
@@ -47,328 +139,317 @@ def initialize_db():
         print(f"❌ 내부 DB 초기화 실패: {e}")
         return False
 
-# 🔥 간단한 키워드 추출 (한국어 → 영어) - 하이브리드 방식
+# 🔥 간단한 키워드 추출 (한국어 → 영어) - 공용 검색어 분석 결과 사용
 def extract_and_translate_keywords(text):
-    """한국어 입력을 영어 키워드로 변환 - 매핑 + 실시간 번역"""
-    # 🔥 확장된 매핑 테이블
-    keyword_map = {
-        # 운동/건강 관련 - 확장
-        '운동': 'exercise physical activity fitness training workout',
-        '체지방': 'body fat weight loss adipose tissue',
-        '감량': 'weight loss reduction decrease',
-        '다이어트': 'diet weight loss nutrition dietary',
-        '근육': 'muscle strength training resistance',
-        '건강': 'health wellness medical fitness',
-        '스포츠': 'sports athletics performance competition',
-        '비만': 'obesity overweight BMI body mass',
-        '식이': 'dietary nutrition food eating',
-        '칼로리': 'calorie energy metabolism burn',
-        '근력': 'strength resistance training power',
-        '지구력': 'endurance cardio aerobic stamina',
-        '헬스': 'fitness health wellness gym',
-        '트레이닝': 'training exercise workout routine',
-        '체중': 'weight body mass scale',
-        '신진대사': 'metabolism metabolic rate energy',
-        
-        # 환경 관련
-        '환경': 'environment environmental pollution ecology',
-        '오염': 'pollution contamination environmental waste',
-        '미세플라스틱': 'microplastic plastic pollution marine ocean',
-        '기후': 'climate change global warming temperature',
-        '재활용': 'recycling waste management sustainability',
-        '지구온난화': 'global warming climate change temperature',
-        '생태계': 'ecosystem ecological environment biodiversity',
-        
-        # 에너지 관련
-        '태양광': 'solar energy renewable photovoltaic panel',
-        '신재생': 'renewable energy sustainable green',
-        '배터리': 'battery energy storage power cell',
-        '연료전지': 'fuel cell hydrogen energy power',
-        '전기': 'electricity electrical power energy',
-        '발전': 'power generation electricity energy',
-        
-        # 생물학 관련
-        '유전자': 'gene genetic DNA molecular biology',
-        '세포': 'cell cellular biology molecular membrane',
-        '항생제': 'antibiotic antimicrobial resistance bacteria',
-        '바이러스': 'virus viral infection disease pathogen',
-        '박테리아': 'bacteria bacterial microbiology pathogen',
-        '단백질': 'protein molecular biology biochemistry',
-        '효소': 'enzyme biochemistry catalysis reaction',
-        
-        # 화학 관련
-        '화학': 'chemistry chemical reaction synthesis compound',
-        '촉매': 'catalyst catalysis chemical reaction',
-        '나노': 'nano nanotechnology materials science',
-        '분자': 'molecule molecular chemistry structure',
-        '반응': 'reaction chemical synthesis process',
-        
-        # 물리학 관련
-        '물리': 'physics mechanical quantum electromagnetic',
-        '전자': 'electronics electronic circuit sensor device',
-        '로봇': 'robot robotics automation artificial intelligence',
-        '센서': 'sensor detection measurement device monitoring',
-        '광학': 'optics optical light laser photon',
-        
-        # 🔥 추가된 분야들
-        '천문학': 'astronomy astrophysics space telescope star',
-        '지질학': 'geology earth science rock mineral',
-        '해양학': 'oceanography marine science water sea',
-        '수학': 'mathematics mathematical statistics analysis',
-        '통계학': 'statistics statistical analysis data',
-        '심리학': 'psychology behavioral cognitive mental',
-        '농업': 'agriculture farming crop plant cultivation',
-        '축산업': 'livestock animal farming agriculture',
-        '기계공학': 'mechanical engineering machinery design',
-        '전기공학': 'electrical engineering electronics circuit',
-        '토목공학': 'civil engineering construction infrastructure',
-        '재료공학': 'materials science engineering polymer',
-        '생명과학': 'life science biology biotechnology',
-        '식품과학': 'food science nutrition technology',
-        
-        # 컴퓨터/AI 관련
-        '인공지능': 'artificial intelligence machine learning AI neural',
-        '딥러닝': 'deep learning neural network AI',
-        '앱': 'application software mobile technology',
-        '데이터': 'data analysis statistics information',
-        '알고리즘': 'algorithm computational programming',
-        
-        # 의학 관련
-        '의학': 'medicine medical health clinical',
-        '치료': 'treatment therapy medical healing',
-        '약물': 'drug pharmaceutical medicine therapy',
-        '질병': 'disease illness medical pathology',
-        '진단': 'diagnosis medical detection screening'
-    }
-    
-    # 입력 텍스트에서 키워드 찾기
-    text_lower = text.lower()
-    matched_keywords = []
-    
-    print(f"📝 입력 텍스트 분석: '{text_lower}'")
-    
-    # 1단계: 매핑 테이블에서 찾기
-    for korean, english in keyword_map.items():
-        if korean in text_lower:
-            matched_keywords.extend(english.split())
-            print(f"   ✅ 매핑: '{korean}' → {english.split()}")
-    
-    # 2단계: 매핑에 없는 한국어가 있으면 Claude로 번역
-    korean_words = re.findall(r'[가-힣]+', text)
-    unmapped_korean = []
-    for word in korean_words:
-        if word not in keyword_map and len(word) >= 2:
-            unmapped_korean.append(word)
-    
-    if unmapped_korean:
-        print(f"   🌐 매핑에 없는 한국어 발견: {unmapped_korean}")
-        try:
-            translated = claude_translate_keywords(unmapped_korean)
-            matched_keywords.extend(translated)
-            print(f"   🤖 Claude 번역 결과: {translated}")
-        except Exception as e:
-            print(f"   ⚠️ Claude 번역 실패: {e}")
-            matched_keywords.extend(unmapped_korean)  # 번역 실패시 원본 사용
-    
-    # 3단계: 영어 단어는 그대로 사용
-    english_words = re.findall(r'[a-zA-Z]+', text)
-    if english_words:
-        matched_keywords.extend(english_words)
-        print(f"   📖 영어 단어 추가: {english_words}")
-    
-    # 4단계: 추가 단어 처리
-    if not matched_keywords:
-        all_words = text.replace(',', ' ').replace('.', ' ').split()
-        for word in all_words:
-            if len(word) >= 2:
-                matched_keywords.append(word)
-        print(f"   📝 모든 단어 추가: {all_words}")
-    
-    # 중복 제거 및 최대 10개로 제한
-    unique_keywords = list(set(matched_keywords))[:10]
-    
-    print(f"🔍 최종 키워드: '{text}' → {unique_keywords}")
-    return unique_keywords
+    """한국어 입력을 영어 키워드로 변환 - 용어집 + 실시간 번역 (analyze_query 결과)"""
+    return list(analyze_query(text, with_phrase=False).keywords)
+
+# 요약 생성에 실패했을 때 쓰는 대체 문구 - 이 문구가 든 결과는 결과 캐시에 넣지 않음
+FALLBACK_SUMMARY = "이 프로젝트는 '{}'에 관한 연구로 추정됩니다."
 
-# 🔥 Claude 번역 함수 추가
-@st.cache_data(show_spinner=False, ttl=3600)
-def claude_translate_keywords(keywords):
-    """매핑에 없는 한국어를 Claude로 번역"""
-    if not keywords:
-        return []
-    
-    try:
-        client = anthropic.Anthropic(api_key=st.secrets["api"]["claude_key"])
-        keyword_text = ", ".join(keywords)
-        
-        response = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=100,
-            system="다음 한국어 과학 용어들을 영어로 번역해주세요. 각 용어마다 관련 영어 키워드를 2-3개씩 포함해서 번역해주세요. 결과는 쉼표로 구분해주세요.",
-            messages=[
-                {"role": "user", "content": f"번역할 한국어: {keyword_text}"}
-            ]
-        )
-        
-        translated = response.content[0].text.strip()
-        result = [k.strip() for k in translated.split(',')]
-        print(f"   Claude 번역: {keyword_text} → {result}")
-        return result
-    except Exception as e:
-        print(f"   Claude 번역 오류: {e}")
-        return keywords  # 실패시 원본 반환
 
-# 🤖 간단한 요약 생성 - 에러 처리 강화
+def _has_fallback_summary(results):
+    """결과 중 요약 대신 대체 문구가 들어간 항목이 있는지 확인"""
+    return any(item['요약'] == FALLBACK_SUMMARY.format(item['제목']) for item in results)
+
+# 🤖 간단한 요약 생성 - 에러 처리 강화 (성공한 요약은 요약 저장소에도 기록)
 @st.cache_data(show_spinner=False, ttl=3600)
 def generate_simple_summary(title, category=None, index=1):
-    """간단한 프로젝트 요약 생성"""
+    """간단한 프로젝트 요약 생성 - 실패는 예외로 전달 (대체 문구가 st.cache_data에 남지 않도록)"""
     try:
-        client = anthropic.Anthropic(api_key=st.secrets["api"]["claude_key"])
-        
-        prompt = f"제목: '{title}'"
-        if category:
-            prompt += f" (분야: {category})"
-        prompt += "\n\n위 과학 프로젝트 제목을 보고 3-4문장으로 내용을 추론해서 설명해주세요. '~로 추정됩니다' 표현을 사용하세요."
-        
-        response = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=200,
-            temperature=0.3,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        
-        return response.content[0].text.strip()
+        summary = request_summary(title, category)
+        store_summary(title, category, summary)
+        return summary
         
     except Exception as e:
         print(f"⚠️ 요약 생성 오류: {e}")
-        return f"이 프로젝트는 '{title}'에 관한 연구로 추정됩니다."
+        raise
 
-# 🎯 메인 검색 함수 - 디버깅 강화 및 임계값 조정
-def search_similar_titles(user_input: str, max_results: int = 5):
-    """간단하고 정확한 검색 함수"""
-    global _DB_INITIALIZED, _PROCESSED_DB, _VECTORIZER, _TFIDF_MATRIX
-    
-    print(f"🔍 검색 시작: '{user_input}'")
-    
-    # DB 초기화
+# 검색용 DB 확보 (필요하면 초기화)
+def _get_search_db():
+    """초기화된 DB 반환 - 전역 DB가 없으면 직접 로드"""
     if not _DB_INITIALIZED:
         print("🔄 DB 초기화 중...")
         initialize_db()
     
     if _PROCESSED_DB is None:
         print("⚠️ 전역 DB 없음, 직접 로드 시도...")
-        df = pd.read_excel(DB_PATH)
+        return load_projects(PARQUET_PATH, DB_PATH)
+    return _PROCESSED_DB
+
+# 패싯 색인 확보 (초기화 전이거나 로드 실패 시 DB에서 한 번 구성)
+def _get_facet_index(df):
+    global _FACET_INDEX
+    if _FACET_INDEX is None or _FACET_INDEX.n_rows != len(df):
+        _FACET_INDEX = FacetIndex.from_frame(df)
+    return _FACET_INDEX
+
+# 설정된 백엔드로 상위 후보 계산
+def _search_candidates(df, search_query, n_candidates, mask=None):
+    """검색어의 상위 후보 (행 번호, 점수, 임계값 목록, 검색어에 걸린 행 번호)를 점수 내림차순으로 반환
+    
+    mask(행별 bool 배열)가 있으면 상위 k개 선택 전에 마스크 밖의 행을 제외
+    검색어에 걸린 행은 마스크 적용 전 기준 (임베딩 백엔드는 k-NN 후보)
+    """
+    if SEARCH_BACKEND == "bm25" and _BM25_INDEX is not None:
+        # 질의 용어의 포스팅만 읽음 (전체 코퍼스 스캔 없음)
+        top, top_scores = bm25_search(_BM25_INDEX, _SEGMENTS, search_query, n_candidates, mask)
+        print(f"   ✅ BM25 역색인 사용")
+        return top, top_scores, BM25_THRESHOLDS, bm25_matching_docs(_BM25_INDEX, _SEGMENTS, search_query)
+    
+    if SEARCH_BACKEND == "dense" and _DENSE_INDEX is not None:
+        # 사전 계산된 ANN 인덱스에서 k-NN 조회
+        top, top_scores = dense_search(_DENSE_INDEX, _SEGMENTS, search_query, n_candidates, mask)
+        print(f"   ✅ 임베딩 k-NN 인덱스 사용 ({_DENSE_INDEX.encoder.name})")
+        return top, top_scores, DENSE_THRESHOLDS, top
+    
+    if SEARCH_BACKEND == "hashing" and _HASHING_INDEX is not None:
+        # 해싱 벡터는 학습 없이 바로 계산 - 기본 + 세그먼트 점수를 이어 붙여 마스크 후 상위 k개
+        scores = hashing_scores(_HASHING_INDEX, _SEGMENTS, search_query)
+        matched = np.flatnonzero(scores > 0)
+        if mask is not None:
+            scores = np.where(mask, scores, 0.0)
+        top = top_k_indices(scores, n_candidates)
+        print(f"   ✅ 해싱 TF-IDF 인덱스 사용")
+        return top, scores[top], HASHING_THRESHOLDS, matched
+    
+    if _VECTORIZER is not None and _TFIDF_MATRIX is not None:
+        search_vector = _VECTORIZER.transform([search_query])
+        cosine_sim = tfidf_scores(search_vector, _TFIDF_MATRIX, _SEGMENTS)
+        print(f"   ✅ 사전 계산된 벡터 사용")
     else:
-        df = _PROCESSED_DB
+        # 새로 계산
+        print("   ⚠️ 새로 벡터 계산 중...")
+        corpus = df['Project Title'].fillna("").astype(str).tolist()
+        corpus.append(search_query)
+        
+        vectorizer = TfidfVectorizer(analyzer='word', ngram_range=(1, 2), lowercase=True)
+        tfidf_matrix = vectorizer.fit_transform(corpus)
+        cosine_sim = cosine_similarity(tfidf_matrix[-1:], tfidf_matrix[:-1])[0]
+    matched = np.flatnonzero(cosine_sim > 0)
+    if mask is not None:
+        cosine_sim = np.where(mask, cosine_sim, 0.0)
+    top = top_k_indices(cosine_sim, n_candidates)
+    return top, cosine_sim[top], SCORE_THRESHOLDS, matched
+
+# 선택된 행으로 결과 항목 구성
+def _build_results(df, selected, selected_scores):
+    """최종 k개 행만 꺼내 요약을 붙인 결과 목록 생성 (전체 프레임 복사 없음)"""
+    top_rows = df.iloc[selected].to_dict('records')
     
+    # 사전 생성된 요약을 한 번에 조회 - 없는 행만 모델 호출
+    stored_summaries = lookup_summaries(top_rows)
+    stored_count = sum(summary is not None for summary in stored_summaries)
+    if stored_count:
+        print(f"   💾 사전 생성 요약 사용: {stored_count}/{len(top_rows)}개")
+    
+    # 요약이 없는 행들은 동시에 생성 (순위 순서 유지, 항목별 제한 시간 + 대체 문구)
+    missing = [i for i, summary in enumerate(stored_summaries) if summary is None]
+    
+    def _summarize(i):
+        row = top_rows[i]
+        return generate_simple_summary(row.get('Project Title', ''), row.get('Category', ''), i + 1)
+    
+    def _fallback(i, error):
+        print(f"⚠️ 요약 생성 실패 ({i+1}번): {error}")
+        return FALLBACK_SUMMARY.format(top_rows[i].get('Project Title', ''))
+    
+    for i, summary in zip(missing, map_in_order(_summarize, missing, _fallback, timeout=SUMMARY_TIMEOUT)):
+        stored_summaries[i] = summary
+    
+    results = []
+    for row, score, summary in zip(top_rows, selected_scores, stored_summaries):
+        result_item = {
+            '제목': row.get('Project Title', ''),
+            '연도': '' if pd.isna(row.get('Year')) else str(row.get('Year')),
+            '분야': row.get('Category', ''),
+            '국가': row.get('Fair Country', ''),
+            '지역': row.get('Fair State', ''),
+            '수상': row.get('Awards', ''),
+            '요약': summary,
+            'score': float(score)
+        }
+        results.append(result_item)
+    return results
+
+# 🎯 메인 검색 함수 - 디버깅 강화 및 임계값 조정
+def search_similar_titles(user_input: str, max_results: int = 5, analysis=None, filters=None):
+    """간단하고 정확한 검색 함수 - analysis(QueryAnalysis)를 주면 키워드 추출을 다시 하지 않음
+    
+    filters: 패싯 필터 (예: {"category": "Plant Sciences", "year": (2018, 2022), "award": True})
+    """
+    return search_with_facets(user_input, max_results, analysis, filters)[0]
+
+# 🎛️ 패싯 필터 검색 - 결과와 함께 검색어에 걸린 행들의 패싯별 개수 반환
+def search_with_facets(user_input: str, max_results: int = 5, analysis=None, filters=None):
+    """검색 결과와 패싯별 개수 {패싯: {값: 개수}} 반환 (필터 형식은 FacetIndex 참고)"""
+    print(f"🔍 검색 시작: '{user_input}'")
+    
+    df = _get_search_db()
     if df.empty:
         print("❌ DB가 비어있음")
-        return []
+        return [], {}
     
     # 1. 키워드 추출 및 변환
     print("📝 1단계: 키워드 추출 및 변환")
-    keywords = extract_and_translate_keywords(user_input)
+    analysis = analysis or analyze_query(user_input, with_phrase=False)
+    keywords = list(analysis.keywords)
     if not keywords:
         print("❌ 키워드 추출 실패")
-        return []
+        return [], {}
     
     search_query = " ".join(keywords)
     print(f"🎯 최종 검색어: '{search_query}'")
     
-    # 2. 유사도 계산
-    print("🔢 2단계: 유사도 계산")
+    # 같은 키워드 집합이면 어순이 달라도 캐시된 결과 사용
+    cache_key = (SEARCH_BACKEND, max_results, analysis.query_key, filters_key(filters))
+    cached = _RESULT_CACHE.get(cache_key)
+    if cached is not None:
+        print(f"💾 캐시된 검색 결과 사용: {len(cached[0])}개 ('{analysis.query_key}')")
+        return cached
+    
+    # 필터 마스크 - 저장된 값별 행 번호 목록으로 구성 (DataFrame 스캔 없음)
+    facet_index = _get_facet_index(df)
+    mask = facet_index.mask(filters)
+    if mask is not None:
+        print(f"🎛️ 패싯 필터: {filters} → {int(mask.sum())}개 행")
+    
+    # 2. 유사도 계산 - 임계값 판정에 필요한 상위 후보만 추림
+    print(f"🔢 2단계: 유사도 계산 ({SEARCH_BACKEND})")
+    n_candidates = max(max_results, MAX_THRESHOLD_RESULTS + 1)
     try:
-        if _VECTORIZER is not None and _TFIDF_MATRIX is not None:
-            search_vector = _VECTORIZER.transform([search_query])
-            cosine_sim = cosine_similarity(search_vector, _TFIDF_MATRIX)[0]
-            print(f"   ✅ 사전 계산된 벡터 사용")
-        else:
-            # 새로 계산
-            print("   ⚠️ 새로 벡터 계산 중...")
-            corpus = df['Project Title'].fillna("").astype(str).tolist()
-            corpus.append(search_query)
-            
-            vectorizer = TfidfVectorizer(analyzer='word', ngram_range=(1, 2), lowercase=True)
-            tfidf_matrix = vectorizer.fit_transform(corpus)
-            cosine_sim = cosine_similarity(tfidf_matrix[-1:], tfidf_matrix[:-1])[0]
+        top, top_scores, thresholds, matched = _search_candidates(df, search_query, n_candidates, mask)
     except Exception as e:
         print(f"❌ 검색 오류: {e}")
-        return []
+        return [], {}
+    facet_counts = facet_index.counts(matched, filters)
     
-    # 3. 결과 정렬 및 필터링
+    # 3. 결과 정렬 및 필터링 - 상위 후보 점수에서 임계값 선택
     print("📊 3단계: 결과 분석")
-    result_df = df.copy()
-    result_df['score'] = cosine_sim
+    selected, selected_scores, threshold, counts = select_from_candidates(
+        top, top_scores, max_results, thresholds
+    )
     
     # 🔥 상위 결과 확인 로그 추가
     print(f"🔢 유사도 계산 완료, 상위 10개 결과:")
-    top_10 = result_df.nlargest(10, 'score')[['Project Title', 'Category', 'score']]
-    for idx, row in top_10.iterrows():
-        print(f"  {row['score']:.6f}: [{row.get('Category', 'N/A')}] {row['Project Title'][:50]}...")
-    
-    # 🔥 더 낮은 임계값으로 점진적 시도
-    thresholds = [0.05, 0.02, 0.01, 0.005, 0.001]  # 더 낮은 임계값 추가
-    filtered_df = None
-    
-    for threshold in thresholds:
-        filtered_df = result_df[result_df['score'] > threshold]
-        result_count = len(filtered_df)
-        print(f"   임계값 {threshold}: {result_count}개 결과")
-        
-        # 적당한 수의 결과가 나오면 중단
-        if 1 <= result_count <= 20:  # 범위 확대 (15→20)
-            print(f"   ✅ 임계값 {threshold} 선택 ({result_count}개)")
+    titles = df['Project Title']
+    categories = df['Category'] if 'Category' in df.columns else None
+    for idx, score in zip(top[:10], top_scores[:10]):
+        category = categories.iat[idx] if categories is not None else 'N/A'
+        print(f"  {score:.6f}: [{category}] {str(titles.iat[idx])[:50]}...")
+    
+    # 🔥 더 낮은 임계값으로 점진적 시도 (상위 후보만으로 개수 판정)
+    for t, count in zip(thresholds, counts):
+        count_text = f"{MAX_THRESHOLD_RESULTS}+" if count > MAX_THRESHOLD_RESULTS else str(count)
+        print(f"   임계값 {t}: {count_text}개 결과")
+        if t == threshold:
             break
     
-    if filtered_df is None or filtered_df.empty:
+    if len(selected) == 0:
         print("❌ 관련 프로젝트를 찾을 수 없음")
-        return []
-    
-    # 4. 상위 결과만 선택 (최대 5개)
-    top_df = filtered_df.sort_values(by='score', ascending=False).head(max_results)
+        _RESULT_CACHE.put(cache_key, ([], facet_counts))
+        return [], facet_counts
+    print(f"   ✅ 임계값 {threshold} 선택")
     
-    print(f"📋 선택된 결과 ({len(top_df)}개):")
-    for idx, row in top_df.iterrows():
-        print(f"  {row['score']:.4f}: [{row.get('Category', 'N/A')}] {row['Project Title'][:60]}...")
+    # 4. 선택 결과 로그
+    print(f"📋 선택된 결과 ({len(selected)}개):")
+    for idx, score in zip(selected, selected_scores):
+        category = categories.iat[idx] if categories is not None else 'N/A'
+        print(f"  {score:.4f}: [{category}] {str(titles.iat[idx])[:60]}...")
     
     # 5. 결과 구성 - 에러 처리 강화
     print("🏗️ 4단계: 결과 구성 및 요약 생성")
-    results = []
-    for i, (_, row) in enumerate(top_df.iterrows()):
-        try:
-            # 간단한 요약 생성
-            summary = generate_simple_summary(
-                row.get('Project Title', ''), 
-                row.get('Category', ''),
-                i + 1
-            )
-        except Exception as e:
-            print(f"⚠️ 요약 생성 실패 ({i+1}번): {e}")
-            summary = f"이 프로젝트는 '{row.get('Project Title', '')}'에 관한 연구로 추정됩니다."
-        
-        result_item = {
-            '제목': row.get('Project Title', ''),
-            '연도': str(row.get('Year', '')),
-            '분야': row.get('Category', ''),
-            '국가': row.get('Fair Country', ''),
-            '지역': row.get('Fair State', ''),
-            '수상': row.get('Awards', ''),
-            '요약': summary,
-            'score': float(row.get('score', 0))
-        }
-        results.append(result_item)
+    results = _build_results(df, selected, selected_scores)
+    if _has_fallback_summary(results):
+        print("⚠️ 대체 요약이 포함되어 결과를 캐시하지 않음 (다음 검색에서 요약 재시도)")
+    else:
+        _RESULT_CACHE.put(cache_key, (results, facet_counts))
     
     print(f"✅ 검색 완료: {len(results)}개 결과 반환")
-    return results
+    return results, facet_counts
+
+# 패싯별 선택 가능한 값 (필터 UI용)
+def facet_values():
+    """{패싯: 정렬된 값 목록} 반환"""
+    df = _get_search_db()
+    if df.empty:
+        return {facet: [] for facet in FACETS}
+    facet_index = _get_facet_index(df)
+    return {facet: facet_index.values(facet) for facet in FACETS}
+
+# 검색 결과 캐시 통계 (적중/실패/삭제, 항목 수, 메모리)
+def result_cache_stats():
+    """검색 결과 캐시 통계 반환"""
+    return _RESULT_CACHE.stats()
+
+# 📚 여러 주제 일괄 검색 (학급 단위 주제 목록용)
+def search_similar_titles_batch(queries, max_results: int = 5):
+    """여러 검색어를 한 번에 처리 - 결과 목록을 입력 순서대로 반환
+    
+    TF-IDF 백엔드에서는 모든 검색어를 하나의 희소 행렬로 변환해
+    한 번의 행렬 곱으로 점수를 계산하고, 행별 상위 k개만 NumPy로 선택함
+    """
+    queries = list(queries)
+    print(f"📚 일괄 검색 시작: {len(queries)}개 주제")
+    if not queries:
+        return []
+    
+    df = _get_search_db()
+    if df.empty:
+        print("❌ DB가 비어있음")
+        return [[] for _ in queries]
+    
+    # 1. 검색어별 키워드 추출 (같은 입력은 한 번만 처리)
+    search_queries = []
+    keyword_cache = {}
+    for query in queries:
+        if query not in keyword_cache:
+            keyword_cache[query] = " ".join(extract_and_translate_keywords(query))
+        search_queries.append(keyword_cache[query])
+    
+    # 2. 상위 후보 계산
+    n_candidates = max(max_results, MAX_THRESHOLD_RESULTS + 1)
+    candidates = []
+    try:
+        if SEARCH_BACKEND == "tfidf" and _VECTORIZER is not None and _TFIDF_MATRIX is not None:
+            # (검색어 수 × 문서 수) 희소 점수 행렬 - 행 정규화된 TF-IDF라 내적 = 코사인
+            query_matrix = _VECTORIZER.transform(search_queries)
+            # 추가 세그먼트는 같은 어휘로 변환되어 있어 열 방향으로 이어 붙이면 됨
+            matrices = [_TFIDF_MATRIX] + [segment.matrix for segment in _SEGMENTS]
+            score_matrix = sparse.hstack([query_matrix @ m.T for m in matrices]).tocsr()
+            score_matrix.sort_indices()
+            for row in range(score_matrix.shape[0]):
+                start, end = score_matrix.indptr[row], score_matrix.indptr[row + 1]
+                row_docs = score_matrix.indices[start:end]
+                row_scores = score_matrix.data[start:end]
+                local = top_k_indices(row_scores, n_candidates)
+                candidates.append((row_docs[local], row_scores[local], SCORE_THRESHOLDS))
+            print(f"   ✅ 희소 행렬 곱 1회로 {len(search_queries)}개 검색어 점수 계산")
+        else:
+            for search_query in search_queries:
+                candidates.append(_search_candidates(df, search_query, n_candidates)[:3])
+    except Exception as e:
+        print(f"❌ 일괄 검색 오류: {e}")
+        return [[] for _ in queries]
+    
+    # 3. 검색어별 임계값 선택 및 결과 구성 (입력 순서 유지)
+    all_results = []
+    for search_query, (top, top_scores, thresholds) in zip(search_queries, candidates):
+        if not search_query:
+            all_results.append([])
+            continue
+        selected, selected_scores, _, _ = select_from_candidates(top, top_scores, max_results, thresholds)
+        all_results.append(_build_results(df, selected, selected_scores))
+    
+    print(f"✅ 일괄 검색 완료: {sum(len(r) for r in all_results)}개 결과")
+    return all_results
 
 # 내부 DB 로드 함수 (폴백용)
 @st.cache_data(ttl=3600)
 def load_internal_db():
     """기본 DB 로드 함수"""
     try:
-        df = pd.read_excel(DB_PATH)
+        df = load_projects(PARQUET_PATH, DB_PATH)
         return df
     except Exception as e:
         st.error(f"❌ 내부 DB 로드 실패: {e}")
@@ -0,0 +1,74 @@
+import re
+import unicodedata
+
+from utils.kv_store import SQLiteStore
+
+# 🌐 한국어 → 영어 번역 저장소 (search_db / search_arxiv 공용, 프로세스 간 공유)
+# - 키워드 번역: 용어 → 영어 키워드 목록
+# - 문장 번역: 검색어 → 영어 문장
+_KEYWORD_STORE = SQLiteStore("translation_keywords")
+_PHRASE_STORE = SQLiteStore("translation_phrases")
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_term(term):
+    """저장소 키용 정규화 (NFC, 공백 정리, 소문자)"""
+    term = unicodedata.normalize("NFC", str(term))
+    return _SPACES.sub(" ", term).strip().lower()
+
+
+def lookup_keyword_translations(terms):
+    """여러 용어의 저장된 키워드 번역 조회 - {정규화된 용어: [영어 키워드]}"""
+    keys = [normalize_term(t) for t in terms]
+    try:
+        return _KEYWORD_STORE.get_many(k for k in keys if k)
+    except Exception as e:
+        print(f"⚠️ 번역 캐시 조회 실패: {e}")
+        return {}
+
+
+def store_keyword_translations(translations):
+    """키워드 번역 저장 - {용어: [영어 키워드]}"""
+    items = {normalize_term(k): v for k, v in translations.items() if normalize_term(k) and v}
+    try:
+        _KEYWORD_STORE.put_many(items)
+    except Exception as e:
+        print(f"⚠️ 번역 캐시 저장 실패: {e}")
+
+
+def lookup_phrase_translation(text):
+    """검색어 문장 번역 조회 (없으면 None)"""
+    key = normalize_term(text)
+    if not key:
+        return None
+    try:
+        return _PHRASE_STORE.get(key)
+    except Exception as e:
+        print(f"⚠️ 번역 캐시 조회 실패: {e}")
+        return None
+
+
+def store_phrase_translation(text, translated):
+    """검색어 문장 번역 저장"""
+    key = normalize_term(text)
+    if not key or not translated:
+        return
+    try:
+        _PHRASE_STORE.put(key, translated)
+    except Exception as e:
+        print(f"⚠️ 번역 캐시 저장 실패: {e}")
+
+
+def parse_keyword_lines(text):
+    """'한국어: 영어1, 영어2' 줄 형식 응답 → {정규화된 용어: [영어 키워드]}"""
+    parsed = {}
+    for line in text.splitlines():
+        if ":" not in line:
+            continue
+        korean, english = line.split(":", 1)
+        key = normalize_term(korean.strip(" -*•\t0123456789."))
+        values = [v.strip() for v in english.split(",") if v.strip()]
+        if key and values:
+            parsed[key] = values
+    return parsed